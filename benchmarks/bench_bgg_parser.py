@@ -0,0 +1,94 @@
+# compares BGGParser with the BeautifulSoup parsing generate_suggestion used before, on synthetic responses
+# and any recorded BoardGameGeek responses given on the command line, e.g.
+#   python -m benchmarks.bench_bgg_parser tests/fixtures/bgg/*.xml
+# needs beautifulsoup4 and lxml, which the bot itself doesn't
+import html
+import sys
+import timeit
+
+from bs4 import BeautifulSoup
+
+from bot.BGGParser import parse_boardgame, summarize_player_poll
+
+
+def parse_boardgame_with_beautifulsoup(page_content, game_id):
+    soup = BeautifulSoup(page_content, 'xml')
+
+    description = html.unescape(soup.find("description").text).replace("<br/>", "\n")
+    image_url = soup.find("image").text
+
+    suggested_players_poll = soup.find("poll", {"name": "suggested_numplayers"})
+    result_dictionary = {}
+    for result in suggested_players_poll.find_all("results"):
+        result_dictionary[result.attrs["numplayers"]] = {
+            "Best": int(result.find("result", {"value": "Best"}).attrs["numvotes"]),
+            "Recommended": int(result.find("result", {"value": "Recommended"}).attrs["numvotes"]),
+            "Not Recommended": int(result.find("result", {"value": "Not Recommended"}).attrs["numvotes"]),
+        }
+    best, recommended_string = summarize_player_poll(result_dictionary)
+
+    min_playtime = soup.find("minplaytime").text
+    max_playtime = soup.find("maxplaytime").text
+    if min_playtime == max_playtime:
+        playtime = min_playtime + " minutes"
+    else:
+        playtime = min_playtime + "-" + max_playtime + " minutes"
+
+    return {
+        "id": game_id,
+        "url": "https://www.boardgamegeek.com/boardgame/" + game_id,
+        "game_title": soup.find("name", {"primary": "true"}).text,
+        "playtime": playtime,
+        "description": description,
+        "image_url": image_url,
+        "best": best,
+        "recommended": recommended_string
+    }
+
+
+def make_response(game_id, player_counts, description_length):
+    buckets = "".join(
+        '<results numplayers="{0}"><result value="Best" numvotes="{1}"/><result value="Recommended" numvotes="{2}"/>'
+        '<result value="Not Recommended" numvotes="{3}"/></results>'.format(
+            str(count) + ("+" if count == player_counts else ""), (count * 37) % 500, (count * 53) % 700,
+            (count * 71) % 400)
+        for count in range(1, player_counts + 1))
+    # about description_length characters once unescaped
+    description = "Trade &amp;amp; build&amp;lt;br/&amp;gt;" * (description_length // 18)
+    return (
+        '<?xml version="1.0" encoding="utf-8"?><boardgames><boardgame objectid="{0}">'
+        '<minplaytime>30</minplaytime><maxplaytime>90</maxplaytime>'
+        '<name sortindex="1">Other Name</name><name primary="true" sortindex="1">Game {0}</name>'
+        '<description>{1}</description><image>https://example.com/{0}.jpg</image>'
+        '<poll title="User Suggested Number of Players" name="suggested_numplayers">{2}</poll>'
+        '</boardgame></boardgames>'.format(game_id, description, buckets)).encode("utf-8")
+
+
+def main(recorded_paths):
+    corpus = [(str(game_id), make_response(game_id, player_counts, description_length))
+              for game_id, (player_counts, description_length) in
+              enumerate([(4, 500), (6, 2000), (10, 4000), (20, 8000), (30, 10000)], start=1)]
+    for path in recorded_paths:
+        with open(path, "rb") as recorded_file:
+            corpus.append((path.rsplit("/", 1)[-1].split(".")[0], recorded_file.read()))
+
+    for game_id, content in corpus:
+        expected = parse_boardgame_with_beautifulsoup(content.decode("utf-8"), game_id)
+        actual = parse_boardgame(content, game_id)
+        # the alternate names were added for the game catalog, BeautifulSoup never read them
+        del actual["alternate_names"]
+        if actual != expected:
+            print("Mismatch for game {0}:\n  BeautifulSoup {1}\n  BGGParser     {2}".format(game_id, expected, actual))
+            sys.exit(1)
+    print("{0} responses parse to the same game info".format(len(corpus)))
+
+    number = 20
+    old = timeit.timeit(lambda: [parse_boardgame_with_beautifulsoup(content.decode("utf-8"), game_id)
+                                 for game_id, content in corpus], number=number) / number
+    new = timeit.timeit(lambda: [parse_boardgame(content, game_id) for game_id, content in corpus],
+                        number=number) / number
+    print("Parsing the corpus: BeautifulSoup {0:.1f} ms, BGGParser {1:.1f} ms".format(old * 1000, new * 1000))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
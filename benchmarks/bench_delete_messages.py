@@ -0,0 +1,71 @@
+# times deleting a poll's tracked messages against a fake channel with a fixed latency per request,
+# fetching each message first as before versus deleting by id, e.g. python -m benchmarks.bench_delete_messages
+import asyncio
+import time
+from types import SimpleNamespace
+
+import discord
+
+from bot.DeletionScheduler import BULK_DELETE_LIMIT, delete_messages_by_id
+
+LATENCY = 0.05
+SIZES = [30, 150, 500]
+
+
+class FakeChannel:
+    def __init__(self, message_ids):
+        self.message_ids = set(message_ids)
+        self.calls = 0
+
+    async def request(self):
+        self.calls += 1
+        await asyncio.sleep(LATENCY)
+
+    async def fetch_message(self, message_id):
+        await self.request()
+        return discord.Object(id=message_id)
+
+    # enforces the limit of Discord's bulk delete endpoint
+    async def delete_messages(self, messages):
+        await self.request()
+        if len(messages) > BULK_DELETE_LIMIT:
+            raise discord.errors.HTTPException(SimpleNamespace(status=400, reason="Bad Request"),
+                                               "Must be between 2 and 100 messages")
+        for message in messages:
+            self.message_ids.discard(message.id)
+
+
+# the path delete_saved_messages took before
+async def delete_by_fetching(channel, message_ids):
+    messages = [await channel.fetch_message(message_id) for message_id in message_ids]
+    try:
+        await channel.delete_messages(messages)
+    except discord.errors.HTTPException:
+        return []
+    return message_ids
+
+
+def make_message_ids(count):
+    now = int(time.time() * 1000) - discord.utils.DISCORD_EPOCH
+    return [(now << 22) + index for index in range(count)]
+
+
+async def measure(delete, count):
+    message_ids = make_message_ids(count)
+    channel = FakeChannel(message_ids)
+    started = time.perf_counter()
+    deleted_ids = await delete(channel, message_ids)
+    elapsed = time.perf_counter() - started
+    return elapsed, channel.calls, len(deleted_ids), len(channel.message_ids)
+
+
+async def main():
+    for count in SIZES:
+        for name, delete in (("fetch then delete", delete_by_fetching), ("delete by id", delete_messages_by_id)):
+            elapsed, calls, deleted, left = await measure(delete, count)
+            print("n={0:3d} {1:17s}: {2:5.2f}s, {3:3d} requests, {4:3d} deleted, {5:3d} left".format(
+                count, name, elapsed, calls, deleted, left))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
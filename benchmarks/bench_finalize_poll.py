@@ -0,0 +1,69 @@
+# times closing a poll as the number of voters and suggestions grows, the set-based statements should keep it
+# close to flat, e.g. python -m benchmarks.bench_finalize_poll
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from bot.Base import create_database_engine
+from bot.DataAccess import DataAccess
+from bot.Migrations import migrate
+from benchmarks.bench_database_modes import make_config
+
+CHANNEL_ID = 500
+SIZES = [(50, 5), (500, 50), (5000, 500)]
+
+
+def fill_poll(engine, member_count, suggestion_count):
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO events (id, channel_id, name, date, rsvp_count) "
+                                "VALUES (1, :channel_id, 'Night', :date, 0)"),
+                           {"channel_id": CHANNEL_ID, "date": datetime.now() + timedelta(days=1)})
+        connection.execute(text("INSERT INTO game_polls (channel_id, event_id, active, finish_time) "
+                                "VALUES (:channel_id, 1, 1, :finish_time)"),
+                           {"channel_id": CHANNEL_ID, "finish_time": datetime.now()})
+        connection.execute(text("INSERT INTO members (id, channel_id, discord_id, name, power) "
+                                "VALUES (:id, :channel_id, :id, 'member', 1)"),
+                           [{"id": member_id, "channel_id": CHANNEL_ID} for member_id in range(1, member_count + 1)])
+        connection.execute(text("INSERT INTO games (id, bgg_id, title, url) VALUES (:id, :id, 'Game', 'url')"),
+                           [{"id": game_id} for game_id in range(1, suggestion_count + 1)])
+        connection.execute(text("INSERT INTO suggestions (id, channel_id, author_id, vote_number, game_id, number_lost) "
+                                "VALUES (:id, :channel_id, :id, :id, :id, 0)"),
+                           [{"id": suggestion_id, "channel_id": CHANNEL_ID}
+                            for suggestion_id in range(1, suggestion_count + 1)])
+        connection.execute(text("INSERT INTO votes (channel_id, member_id, suggestion_id) "
+                                "VALUES (:channel_id, :member_id, :suggestion_id)"),
+                           [{"channel_id": CHANNEL_ID, "member_id": member_id,
+                             "suggestion_id": member_id % suggestion_count + 1}
+                            for member_id in range(1, member_count + 1)])
+
+
+def measure(directory, member_count, suggestion_count):
+    engine = create_database_engine(make_config("sqlite:///" + os.path.join(directory, str(member_count) + ".db")))
+    migrate(engine)
+    fill_poll(engine, member_count, suggestion_count)
+    database = DataAccess()
+    started = time.perf_counter()
+    closed = asyncio.run(database.finalize_poll(CHANNEL_ID, 1))
+    elapsed = time.perf_counter() - started
+    database.close()
+    engine.dispose()
+    assert closed
+    return elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        # the first close compiles every statement, it isn't counted
+        measure(directory, 10, 2)
+        for member_count, suggestion_count in SIZES:
+            elapsed = measure(directory, member_count, suggestion_count)
+            print("{0:5d} members / {1:3d} suggestions: {2:6.1f} ms".format(member_count, suggestion_count,
+                                                                          elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+# replays commands from a few thousand members against a bot on a fake channel and prints the peak RSS after every
+# tenth of them, each command's session is dropped once it is done, so it should stay close to flat instead of
+# growing with every command, e.g. python -m benchmarks.bench_memory
+import asyncio
+import contextlib
+import os
+import resource
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import discord
+
+from bot.Base import create_database_engine
+from bot.Migrations import migrate
+from bot.TabletopBot import TabletopBot
+
+COMMAND_COUNT = 100000
+MEMBER_COUNT = 5000
+CHANNEL_ID = 500
+OWNER_ID = 1
+COMMANDS = ["!rsvp 1", "!power", "!events", "!vote 1", "!suggestions", "!cancel 1", "!ping", "!vote 2"]
+
+CONFIG = """[Credentials]
+Token = token
+[Permissions]
+OwnerID = {0}
+[Chat]
+CommandPrefix = !
+BindToChannels = {1}
+MentionGroupID = 77
+MessagesPerSecond = 1000000
+MessageBurst = 1000000
+[Database]
+URL = sqlite:///{2}
+"""
+
+
+class FakeMessage:
+    def __init__(self, channel, message_id, content, author=None):
+        self.channel = channel
+        self.id = message_id
+        self.content = content
+        self.author = author
+
+    async def pin(self):
+        pass
+
+    async def edit(self, content):
+        self.content = content
+
+    async def delete(self):
+        pass
+
+
+class FakeAuthor:
+    def __init__(self, author_id):
+        self.id = author_id
+        self.name = "member{0}".format(author_id)
+
+    def __str__(self):
+        return self.name + "#0001"
+
+
+# keeps nothing it sends, so only the bot's own memory is measured
+class FakeChannel:
+    def __init__(self):
+        self.id = CHANNEL_ID
+        self.name = "games"
+        self.message_count = 0
+
+    def next_id(self):
+        self.message_count += 1
+        return ((int(time.time() * 1000) - discord.utils.DISCORD_EPOCH) << 22) + self.message_count % (1 << 22)
+
+    async def send(self, content=None, **kwargs):
+        return FakeMessage(self, self.next_id(), content)
+
+    async def delete_messages(self, messages):
+        pass
+
+
+def get_peak_rss():
+    # kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def replay(bot, channel, results):
+    owner = FakeAuthor(OWNER_ID)
+    for number in range(1, 6):
+        game_info = {"id": number, "url": "https://boardgamegeek.com/boardgame/{0}".format(number),
+                     "game_title": "Game {0}".format(number), "playtime": "60 minutes", "description": "A game",
+                     "image_url": "https://example.com/{0}.png".format(number), "best": "4", "recommended": "3-4"}
+        game = await bot.database.add_game(game_info)
+        member = await bot.database.get_member(CHANNEL_ID, OWNER_ID, str(owner))
+        await bot.database.add_suggestion(CHANNEL_ID, member.id, game.id)
+    await bot.database.create_event(CHANNEL_ID, datetime.now() + timedelta(days=30), "Game Night")
+    await bot.on_message(FakeMessage(channel, channel.next_id(), "!start_vote 1 1000", owner))
+
+    authors = [FakeAuthor(OWNER_ID + 1 + index) for index in range(MEMBER_COUNT)]
+    started = time.perf_counter()
+    for index in range(COMMAND_COUNT):
+        message = FakeMessage(channel, channel.next_id(), COMMANDS[index % len(COMMANDS)],
+                              authors[index % MEMBER_COUNT])
+        await bot.on_message(message)
+        if (index + 1) % (COMMAND_COUNT // 10) == 0:
+            results.append((index + 1, get_peak_rss(), time.perf_counter() - started))
+
+
+async def measure(bot):
+    channel = FakeChannel()
+    bot.channels[CHANNEL_ID].channel = channel
+    results = []
+    # on_message prints every command
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        await replay(bot, channel, results)
+
+    bot.message_dispatcher.close()
+    bot.deletion_scheduler.close()
+    bot.job_scheduler.close()
+    for state in bot.channels.values():
+        state.live_board.detach()
+    await bot.bgg_client.close()
+    return results
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        config_file = os.path.join(directory, "options.ini")
+        with open(config_file, "w") as file:
+            file.write(CONFIG.format(OWNER_ID, CHANNEL_ID, os.path.join(directory, "bot.db")))
+        TabletopBot.config_file = config_file
+
+        engine = create_database_engine(TabletopBot.open_config(config_file))
+        migrate(engine)
+        engine.dispose()
+        bot = TabletopBot()
+        print("before replaying: {0:6.1f} MB peak RSS".format(get_peak_rss()))
+        for command_count, peak_rss, elapsed in asyncio.run(measure(bot)):
+            print("{0:6d} commands: {1:6.1f} MB peak RSS after {2:5.1f} s".format(command_count, peak_rss, elapsed))
+        bot.database.close()
+        bot.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from bot.LRUCache import LRUCache
+from bot.models.CacheEntry import CacheEntry
+
+
+class BGGCache:
+    def __init__(self, database, ttls, memory_size=256, max_rows=5000):
+        # ttls maps a namespace such as "search" or "boardgame" to a timedelta
+        self.database = database
+        self.ttls = ttls
+        self.max_rows = max_rows
+        self.memory = LRUCache(memory_size)
+
+        self.stats = {
+            "memory_hits": 0,
+            "database_hits": 0,
+            "misses": 0
+        }
+
+    @classmethod
+    def from_config(cls, database, config):
+        ttls = {
+            "search": timedelta(hours=config["bgg_cache_search_ttl"]),
+            "boardgame": timedelta(hours=config["bgg_cache_game_ttl"])
+        }
+        return cls(database, ttls, memory_size=config["bgg_cache_memory_size"], max_rows=config["bgg_cache_max_rows"])
+
+    async def get(self, namespace, key):
+        now = datetime.now()
+        cached = self.memory.get((namespace, key))
+        if cached is not None:
+            value, expires_at = cached
+            if expires_at > now:
+                self.stats["memory_hits"] += 1
+                return value
+            self.memory.pop((namespace, key))
+
+        cached = await self.database.run(self.get_from_database, namespace, key, now)
+        if cached is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.memory.set((namespace, key), cached)
+        self.stats["database_hits"] += 1
+        return cached[0]
+
+    async def set(self, namespace, key, value):
+        now = datetime.now()
+        expires_at = now + self.ttls[namespace]
+        self.memory.set((namespace, key), (value, expires_at))
+        await self.database.run(self.set_in_database, namespace, key, value, expires_at, now)
+
+    @staticmethod
+    def get_from_database(session, namespace, key, now):
+        entry = session.query(CacheEntry) \
+            .filter(CacheEntry.namespace == namespace, CacheEntry.key == key) \
+            .first()
+        if entry is None or entry.expires_at <= now:
+            return None
+
+        entry.accessed_at = now
+        session.commit()
+        return entry.value, entry.expires_at
+
+    def set_in_database(self, session, namespace, key, value, expires_at, now):
+        entry = session.query(CacheEntry) \
+            .filter(CacheEntry.namespace == namespace, CacheEntry.key == key) \
+            .first()
+        if entry is None:
+            entry = CacheEntry(namespace=namespace, key=key)
+            session.add(entry)
+        entry.value = value
+        entry.expires_at = expires_at
+        entry.accessed_at = now
+        try:
+            session.commit()
+        except IntegrityError:
+            # another worker process cached the same key first, its row is updated instead
+            session.rollback()
+            session.query(CacheEntry) \
+                .filter(CacheEntry.namespace == namespace, CacheEntry.key == key) \
+                .update({CacheEntry.value: value, CacheEntry.expires_at: expires_at, CacheEntry.accessed_at: now},
+                        synchronize_session=False)
+            session.commit()
+        self.evict(session, now)
+
+    # drops expired rows, then the least recently used ones until the table fits in max_rows
+    def evict(self, session, now):
+        session.query(CacheEntry).filter(CacheEntry.expires_at <= now).delete(synchronize_session=False)
+        row_count = session.query(CacheEntry.id).count()
+        if row_count > self.max_rows:
+            oldest_ids = [row.id for row in session.query(CacheEntry.id)
+                          .order_by(CacheEntry.accessed_at)
+                          .limit(row_count - self.max_rows)
+                          .all()]
+            session.query(CacheEntry) \
+                .filter(CacheEntry.id.in_(oldest_ids)) \
+                .delete(synchronize_session=False)
+        session.commit()
+
+    def get_stats_string(self):
+        lookups = self.stats["memory_hits"] + self.stats["database_hits"] + self.stats["misses"]
+        hits = self.stats["memory_hits"] + self.stats["database_hits"]
+        hit_rate = 0 if lookups == 0 else 100 * hits / lookups
+        return "BGG cache: {0} memory hits, {1} database hits, {2} misses ({3:.0f}% hit rate)".format(
+            self.stats["memory_hits"], self.stats["database_hits"], self.stats["misses"], hit_rate)
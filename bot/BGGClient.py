@@ -0,0 +1,84 @@
+import asyncio
+from urllib.parse import quote
+
+import aiohttp
+
+
+class BGGError(Exception):
+    pass
+
+
+class BGGClient:
+    # BGG answers 202 while it queues a request and 429/503 when throttling
+    RETRY_STATUSES = (202, 429, 503)
+
+    def __init__(self, base_url="https://boardgamegeek.com", timeout=15, max_connections=4, max_retries=5,
+                 retry_delay=1.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self._http_session = None
+        self._semaphore = asyncio.Semaphore(max_connections)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            base_url=config["bgg_base_url"],
+            timeout=config["bgg_timeout"],
+            max_connections=config["bgg_max_connections"],
+            max_retries=config["bgg_max_retries"],
+            retry_delay=config["bgg_retry_delay"]
+        )
+
+    # the pooled session is created lazily so it binds to the running loop
+    def get_http_session(self):
+        if self._http_session is None or self._http_session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            self._http_session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._http_session
+
+    async def close(self):
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
+
+    async def get(self, path, params=None):
+        url = self.base_url + path
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                try:
+                    async with self.get_http_session().get(url, params=params) as response:
+                        if response.status == 200:
+                            return await response.read()
+                        if response.status not in self.RETRY_STATUSES:
+                            raise BGGError("BGG returned HTTP {0} for {1}".format(response.status, url))
+                        retry_after = response.headers.get("Retry-After")
+                except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                    if attempt == self.max_retries:
+                        raise BGGError("BGG request failed for {0}: {1!r}".format(url, error))
+                    retry_after = None
+
+            if attempt == self.max_retries:
+                break
+            if retry_after is not None and retry_after.isdigit():
+                await asyncio.sleep(int(retry_after))
+            else:
+                await asyncio.sleep(delay)
+            delay *= 2
+        raise BGGError("BGG did not answer {0} after {1} retries".format(url, self.max_retries))
+
+    async def search(self, search_string):
+        return await self.get("/xmlapi/search", params={"search": search_string})
+
+    async def fetch_game(self, game_id):
+        return await self.get("/xmlapi/boardgame/" + str(game_id))
+
+    async def fetch_games(self, game_ids):
+        return await self.get("/xmlapi/boardgame/" + ",".join(str(game_id) for game_id in game_ids))
+
+    async def fetch_collection(self, username):
+        return await self.get("/xmlapi/collection/" + quote(username), params={"own": 1})
@@ -0,0 +1,154 @@
+import html
+from io import BytesIO
+from xml.etree.ElementTree import iterparse
+
+
+def iterparse_content(content, events=("start", "end")):
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return iterparse(BytesIO(content), events=events)
+
+
+# returns the objectid of the first game in an xmlapi/search response, or None
+def parse_search(content):
+    for event, element in iterparse_content(content, events=("start",)):
+        if element.tag == "boardgame":
+            return element.attrib.get("objectid")
+    return None
+
+
+# parses an xmlapi/boardgame response into the same dictionary Game.get_game_info returns
+def parse_boardgame(content, game_id):
+    for game_info in parse_boardgames(content, game_id):
+        return game_info
+    return None
+
+
+# yields one game info dictionary per <boardgame> in a response, several ids can be fetched at once
+def parse_boardgames(content, game_id=None):
+    fields = None
+    for event, element in iterparse_content(content):
+        tag = element.tag
+        if tag == "boardgame":
+            if event == "start":
+                fields = {
+                    "objectid": element.attrib.get("objectid"),
+                    "description": None,
+                    "image": None,
+                    "minplaytime": None,
+                    "maxplaytime": None,
+                    "name": None,
+                    "alternate_names": []
+                }
+                result_dictionary = {}
+                in_player_poll = False
+                player_poll_seen = False
+                current_results = None
+            else:
+                # unknown ids come back as a <boardgame> holding only an <error>
+                if fields["name"] is not None:
+                    yield build_game_info(fields, result_dictionary, game_id or fields["objectid"])
+                element.clear()
+                fields = None
+            continue
+        if fields is None:
+            continue
+
+        if event == "start":
+            if tag == "poll" and not player_poll_seen and element.attrib.get("name") == "suggested_numplayers":
+                in_player_poll = True
+                player_poll_seen = True
+            elif tag == "results" and in_player_poll:
+                current_results = {}
+                result_dictionary[element.attrib.get("numplayers")] = current_results
+            elif tag == "result" and current_results is not None:
+                current_results.setdefault(element.attrib.get("value"), int(element.attrib.get("numvotes", 0)))
+            continue
+
+        if tag == "name" and element.attrib.get("primary") != "true":
+            fields["alternate_names"].append("".join(element.itertext()))
+        elif tag in fields:
+            if fields[tag] is None:
+                fields[tag] = "".join(element.itertext())
+        elif tag == "results":
+            current_results = None
+        elif tag == "poll":
+            in_player_poll = False
+        # everything needed has been copied out, so the subtree can be dropped
+        element.clear()
+
+
+def build_game_info(fields, result_dictionary, game_id):
+    for suggestions in result_dictionary.values():
+        for value in ("Best", "Recommended", "Not Recommended"):
+            suggestions.setdefault(value, 0)
+
+    best_players, recommended_string = summarize_player_poll(result_dictionary)
+
+    min_playtime = fields["minplaytime"]
+    max_playtime = fields["maxplaytime"]
+    if min_playtime == max_playtime:
+        playtime = min_playtime + " minutes"
+    else:
+        playtime = min_playtime + "-" + max_playtime + " minutes"
+
+    game_info = {
+        "id": game_id,
+        "url": "https://www.boardgamegeek.com/boardgame/" + game_id,
+        "game_title": fields["name"],
+        "playtime": playtime,
+        "description": html.unescape(fields["description"]).replace("<br/>", "\n"),
+        "image_url": fields["image"],
+        "best": best_players,
+        "recommended": recommended_string,
+        "alternate_names": fields["alternate_names"]
+    }
+    return game_info
+
+
+# returns the objectids of every game in an xmlapi/collection response
+def parse_collection(content):
+    game_ids = []
+    for event, element in iterparse_content(content, events=("start",)):
+        if element.tag == "item" and element.attrib.get("subtype", "boardgame") == "boardgame":
+            game_ids.append(element.attrib["objectid"])
+    return game_ids
+
+
+def summarize_player_poll(result_dictionary):
+    result_conclusions = {
+        "Best": {
+            "number of players": 0,
+            "votes": 0
+        },
+        "Recommended": {
+            "min-title": "N/A",
+            "min-value": 1000,
+            "max-title": "N/A",
+            "max-value": -1
+        }
+    }
+    for number_of_players, suggestions in result_dictionary.items():
+        # best first
+        if suggestions["Best"] > result_conclusions["Best"]["votes"]:
+            result_conclusions["Best"] = {
+                "number of players": number_of_players,
+                "votes": suggestions["Best"]
+            }
+        if suggestions["Best"] + suggestions["Recommended"] > suggestions["Not Recommended"]:
+            if number_of_players.find("+") != -1:
+                result_conclusions["Recommended"]["max-title"] = number_of_players
+                result_conclusions["Recommended"]["max-value"] = int(number_of_players[:-1]) + 1
+            else:
+                int_players = int(number_of_players)
+                if int_players > result_conclusions["Recommended"]["max-value"]:
+                    result_conclusions["Recommended"]["max-value"] = int_players
+                    result_conclusions["Recommended"]["max-title"] = number_of_players
+                if int_players < result_conclusions["Recommended"]["min-value"]:
+                    result_conclusions["Recommended"]["min-value"] = int_players
+                    result_conclusions["Recommended"]["min-title"] = number_of_players
+
+    recommended_string = str(result_conclusions["Recommended"]["min-title"]) + "-" + str(
+        result_conclusions["Recommended"]["max-title"]) + " Players"
+
+    return result_conclusions["Best"]["number of players"], recommended_string
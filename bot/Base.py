@@ -1,11 +1,30 @@
-from os.path import isfile
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-bot_database_file = "bot.db"
-if not isfile(bot_database_file):
-    open(bot_database_file, 'w').close()
-engine = create_engine('sqlite:///bot.db')
-Session = sessionmaker(bind=engine)
+Session = sessionmaker()
 Base = declarative_base()
+engine = None
+
+
+def create_database_engine(config):
+    global engine
+    url = config["database_url"]
+    if url.startswith("sqlite"):
+        engine = create_engine(url)
+
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            # WAL lets readers carry on during a write, NORMAL only fsyncs at checkpoints instead of every commit
+            cursor.execute("PRAGMA journal_mode=" + config["sqlite_journal_mode"])
+            cursor.execute("PRAGMA synchronous=" + config["sqlite_synchronous"])
+            cursor.execute("PRAGMA cache_size=-{0:d}".format(config["sqlite_cache_size"]))
+            cursor.execute("PRAGMA mmap_size={0:d}".format(config["sqlite_mmap_size"] * 1024 * 1024))
+            cursor.execute("PRAGMA busy_timeout={0:d}".format(config["sqlite_busy_timeout"]))
+            cursor.close()
+    else:
+        engine = create_engine(url, pool_size=config["database_pool_size"],
+                               max_overflow=config["database_max_overflow"], pool_pre_ping=True)
+    Session.configure(bind=engine)
+    return engine
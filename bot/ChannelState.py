@@ -0,0 +1,22 @@
+from bot.LiveBoard import LiveBoard
+
+
+# everything the bot keeps in memory for one bound channel, each channel has its own events, suggestions and poll
+class ChannelState:
+    def __init__(self, channel_id, mention_group_id, live_board):
+        self.channel_id = channel_id
+        self.mention_group_id = mention_group_id
+        # looked up once the bot is connected
+        self.channel = None
+        # running totals of the channel's active poll, loaded from the database when first needed
+        self.vote_tally = None
+        self.live_board = live_board
+
+    @classmethod
+    def from_config(cls, channel_id, mention_group_id, render, config):
+        state = cls(channel_id, mention_group_id, None)
+        state.live_board = LiveBoard.from_config(lambda: render(state), config)
+        return state
+
+    def get_mention_group_string(self):
+        return "<@&" + self.mention_group_id + ">"
@@ -0,0 +1,513 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import case, func, desc
+from sqlalchemy.exc import IntegrityError
+
+from bot.Base import Session
+from bot.LRUCache import LRUCache
+from bot.Migrations import count_rsvps
+from bot.models.Event import Event
+from bot.models.Game import Game
+from bot.models.GamePoll import GamePoll
+from bot.models.Member import Member
+from bot.models.Messages import Message
+from bot.models.RSVP import RSVP
+from bot.models.Suggestion import Suggestion
+from bot.models.Vote import Vote
+from bot.VoteNumberAllocator import VoteNumberAllocator
+from bot.VoteTally import VoteTally
+
+
+# the session of the command being handled, see DataAccess.unit_of_work
+current_unit_of_work = ContextVar("current_unit_of_work", default=None)
+
+
+class UnitOfWork:
+    def __init__(self):
+        self.session = None
+
+
+# a task copies the context it was started in, so one started by a command would keep using the command's
+# session after the command has closed it, tasks that can outlive a command run their coroutine through this
+async def outside_unit_of_work(coroutine):
+    current_unit_of_work.set(None)
+    return await coroutine
+
+
+# turns a method taking (self, session, ...) into a coroutine that runs it on the database thread
+def in_database_thread(function):
+    @functools.wraps(function)
+    async def wrapper(self, *args):
+        return await self.run(functools.partial(function, self), *args)
+    return wrapper
+
+
+class DataAccess:
+    def __init__(self, member_cache_size=1024):
+        # one worker thread runs every query, so queries never run on the event loop
+        # and never run concurrently with each other
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="database")
+        # VoteNumberAllocators by channel_id, only touched on the database thread,
+        # which also serializes concurrent !suggest calls
+        self.vote_numbers = {}
+        # Members by (channel_id, discord_id), only used on the event loop
+        self.members = LRUCache(member_cache_size)
+
+    # each command gets its own session, so its identity map is dropped when the command is done
+    # and a failed commit only rolls back that command
+    @asynccontextmanager
+    async def unit_of_work(self):
+        unit_of_work = UnitOfWork()
+        token = current_unit_of_work.set(unit_of_work)
+        try:
+            yield unit_of_work
+        finally:
+            current_unit_of_work.reset(token)
+            if unit_of_work.session is not None:
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(self.executor, unit_of_work.session.close)
+
+    async def run(self, function, *args):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, self._call, current_unit_of_work.get(), function, args)
+
+    # outside a command, e.g. background refreshes, every call gets a session of its own
+    def _call(self, unit_of_work, function, args):
+        if unit_of_work is None:
+            session = self.create_session()
+        else:
+            if unit_of_work.session is None:
+                unit_of_work.session = self.create_session()
+            session = unit_of_work.session
+        try:
+            result = function(session, *args)
+            # every call is its own transaction, so reads don't keep a connection checked out between calls
+            session.commit()
+            return result
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            if unit_of_work is None:
+                session.close()
+
+    # handlers read the rows they have just written and hand them back to the event loop,
+    # so committing doesn't expire them and the rows aren't loaded a second time
+    @staticmethod
+    def create_session():
+        return Session(expire_on_commit=False)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def get_vote_numbers(self, channel_id):
+        vote_numbers = self.vote_numbers.get(channel_id)
+        if vote_numbers is None:
+            vote_numbers = self.vote_numbers[channel_id] = VoteNumberAllocator()
+        return vote_numbers
+
+    # Members
+
+    # gets member or creates one if they don't exist, most commands are answered from the cache
+    # a Discord user has a member in every channel they use, so their voting power is kept per channel
+    async def get_member(self, channel_id, discord_id, name):
+        member = self.members.get((channel_id, discord_id))
+        if member is None or member.name != name:
+            member = await self.run(self.load_member, channel_id, discord_id, name)
+            self.members.set((channel_id, discord_id), member)
+        return member
+
+    # power is changed by bulk updates, so the row is always reloaded rather than taken from the session
+    def load_member(self, session, channel_id, discord_id, name):
+        member = session.query(Member).populate_existing() \
+            .filter(Member.channel_id == channel_id, Member.discord_id == discord_id).first()
+        if member is None:
+            member = Member(channel_id=channel_id, discord_id=discord_id, name=name, power=1)
+            session.add(member)
+        elif member.name != name:
+            member.name = name
+        else:
+            return member
+        try:
+            session.commit()
+        except IntegrityError:
+            # another process added this member first
+            session.rollback()
+            member = session.query(Member) \
+                .filter(Member.channel_id == channel_id, Member.discord_id == discord_id).first()
+        return member
+
+    # Events and RSVPs
+
+    # events, suggestions, polls, votes and tracked messages belong to the channel they were made in,
+    # every lookup of them is filtered by its channel_id
+
+    # one query for the whole list, with the winning game's title and url joined in
+    @in_database_thread
+    def get_upcoming_events(self, session, channel_id, now):
+        return session \
+            .query(Event.id, Event.name, Event.date, Event.game_decided, Event.winning_game_id,
+                   Game.title.label("winning_title"), Game.url.label("winning_url"),
+                   Event.rsvp_count.label("count")) \
+            .outerjoin(Game, Game.id == Event.winning_game_id) \
+            .filter(Event.channel_id == channel_id, Event.date > now) \
+            .all()
+
+    @in_database_thread
+    def get_event(self, session, channel_id, event_id):
+        return session.query(Event).filter(Event.channel_id == channel_id, Event.id == event_id).first()
+
+    # for scheduled jobs, which only know the event's id
+    @in_database_thread
+    def get_event_by_id(self, session, event_id):
+        return session.query(Event).filter(Event.id == event_id).first()
+
+    @in_database_thread
+    def create_event(self, session, channel_id, event_date_time, name):
+        new_event = Event(channel_id=channel_id, date=event_date_time, name=name)
+        session.add(new_event)
+        session.commit()
+        return new_event
+
+    # deletes the event with its GamePoll, Votes and RSVPs, returns None if there is no such event
+    # or whether it had a poll running
+    @in_database_thread
+    def cancel_event(self, session, channel_id, event_id):
+        if session.query(Event.id).filter(Event.channel_id == channel_id, Event.id == event_id).first() is None:
+            return None
+
+        had_poll = session.query(GamePoll).filter(GamePoll.event_id == event_id) \
+            .delete(synchronize_session="fetch") > 0
+        if had_poll:
+            session.query(Vote).filter(Vote.channel_id == channel_id).delete(synchronize_session="fetch")
+        session.query(RSVP).filter(RSVP.event_id == event_id).delete(synchronize_session="fetch")
+        session.query(Event).filter(Event.id == event_id).delete(synchronize_session="fetch")
+        session.commit()
+        return had_poll
+
+    @in_database_thread
+    def get_rsvp_count(self, session, event_id):
+        return session.query(Event.rsvp_count).filter(Event.id == event_id).scalar()
+
+    # the counter moves in the same transaction as the RSVP itself
+    def change_rsvp_count(self, session, event_id, change):
+        session.query(Event).filter(Event.id == event_id) \
+            .update({Event.rsvp_count: Event.rsvp_count + change}, synchronize_session=False)
+        return session.query(Event.rsvp_count).filter(Event.id == event_id).scalar()
+
+    # returns the new attendee count, or None if the member had already RSVP'd
+    @in_database_thread
+    def add_rsvp(self, session, member_id, event_id):
+        previous_rsvp = session.query(RSVP).filter(RSVP.member_id == member_id, RSVP.event_id == event_id).first()
+        if previous_rsvp is not None:
+            return None
+        session.add(RSVP(member_id=member_id, event_id=event_id))
+        rsvp_count = self.change_rsvp_count(session, event_id, 1)
+        session.commit()
+        return rsvp_count
+
+    # returns the new attendee count, or None if the member never RSVP'd
+    @in_database_thread
+    def remove_rsvp(self, session, member_id, event_id):
+        previous_rsvp = session.query(RSVP).filter(RSVP.member_id == member_id, RSVP.event_id == event_id).first()
+        if previous_rsvp is None:
+            return None
+        session.delete(previous_rsvp)
+        rsvp_count = self.change_rsvp_count(session, event_id, -1)
+        session.commit()
+        return rsvp_count
+
+    # returns how many events had a wrong count
+    @in_database_thread
+    def repair_rsvp_counts(self, session):
+        repaired = count_rsvps(session)
+        session.commit()
+        return repaired
+
+    # Games and Suggestions
+
+    @in_database_thread
+    def get_game_by_bgg_id(self, session, bgg_id):
+        return session.query(Game).filter(Game.bgg_id == bgg_id).first()
+
+    # inserts the game, or returns the existing row if another process inserted it first
+    @in_database_thread
+    def add_game(self, session, game_info):
+        game_database_entry = Game()
+        game_database_entry.set_game_info(game_info)
+        session.add(game_database_entry)
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            return session.query(Game).filter(Game.bgg_id == game_info["id"]).first()
+        return game_database_entry
+
+    @in_database_thread
+    def get_suggestion_author(self, session, channel_id, game_id):
+        return session.query(Suggestion.id, Member.name).join(Member) \
+            .filter(Suggestion.channel_id == channel_id, Suggestion.game_id == game_id).first()
+
+    # returns None if the game was suggested in the channel while this suggestion was being made
+    @in_database_thread
+    def add_suggestion(self, session, channel_id, member_id, game_id):
+        vote_numbers = self.get_vote_numbers(channel_id)
+        for attempt in range(3):
+            if not vote_numbers.is_loaded():
+                vote_numbers.load(result.vote_number for result in
+                                  session.query(Suggestion.vote_number).filter(Suggestion.channel_id == channel_id))
+
+            # make lowest possible vote_number
+            vote_number = vote_numbers.allocate()
+            suggestion = Suggestion(
+                channel_id=channel_id,
+                author_id=member_id,
+                vote_number=vote_number,
+                game_id=game_id,
+                number_lost=0
+            )
+            session.add(suggestion)
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                if session.query(Suggestion.id) \
+                        .filter(Suggestion.channel_id == channel_id, Suggestion.game_id == game_id).first() is not None:
+                    vote_numbers.release(vote_number)
+                    return None
+                # another process took that number, reload the free list from the unique index
+                vote_numbers.reset()
+                if attempt == 2:
+                    raise
+                continue
+            return suggestion
+
+    @in_database_thread
+    def has_suggestions(self, session, channel_id):
+        return session.query(Suggestion).filter(Suggestion.channel_id == channel_id).first() is not None
+
+    # only the columns the embed shows, the description is cut just past the embed's 2044 character limit
+    @in_database_thread
+    def get_suggested_game_infos(self, session, channel_id):
+        rows = session.query(
+            Game.bgg_id,
+            Game.url,
+            Game.title,
+            Game.playtime,
+            func.substr(Game.description, 1, 2045).label("description"),
+            Game.image_url,
+            Game.best_players,
+            Game.recommended_players) \
+            .join(Suggestion) \
+            .filter(Suggestion.channel_id == channel_id) \
+            .all()
+        return [{
+            "id": row.bgg_id,
+            "url": row.url,
+            "game_title": row.title,
+            "playtime": row.playtime,
+            "description": row.description,
+            "image_url": row.image_url,
+            "best": row.best_players,
+            "recommended": row.recommended_players
+        } for row in rows]
+
+    @in_database_thread
+    def get_suggestion_by_vote_number(self, session, channel_id, vote_number):
+        return session.query(Suggestion) \
+            .filter(Suggestion.channel_id == channel_id, Suggestion.vote_number == vote_number).first()
+
+    # votes can't outlive their suggestions, so any cast in a running poll go too
+    @in_database_thread
+    def clear_suggestions(self, session, channel_id):
+        session.query(Vote).filter(Vote.channel_id == channel_id).delete(synchronize_session="fetch")
+        session.query(Suggestion).filter(Suggestion.channel_id == channel_id).delete(synchronize_session="fetch")
+        session.commit()
+        self.get_vote_numbers(channel_id).load([])
+
+    # Polls and Votes
+
+    @in_database_thread
+    def get_poll(self, session, channel_id):
+        return session.query(GamePoll).filter(GamePoll.channel_id == channel_id).first()
+
+    # for scheduled jobs, which only know the poll's id
+    @in_database_thread
+    def get_poll_by_id(self, session, poll_id):
+        return session.query(GamePoll).filter(GamePoll.id == poll_id).first()
+
+    @in_database_thread
+    def get_active_polls(self, session):
+        return session.query(GamePoll).filter(GamePoll.active).all()
+
+    @in_database_thread
+    def start_poll(self, session, channel_id, event_id, finish_time):
+        game_poll = GamePoll(channel_id=channel_id, active=True, finish_time=finish_time, event_id=event_id)
+        session.add(game_poll)
+        session.commit()
+        return game_poll
+
+    @in_database_thread
+    def set_poll_board_message(self, session, poll_id, message_id):
+        session.query(GamePoll).filter(GamePoll.id == poll_id).update({GamePoll.board_message_id: message_id})
+        session.commit()
+
+    @in_database_thread
+    def member_can_vote(self, session, channel_id, member_id):
+        return session.query(GamePoll).join(Event).join(RSVP).join(Member).filter(
+            GamePoll.channel_id == channel_id, Member.id == member_id).first() is not None
+
+    # replaces the member's previous vote, if any, members have at most one vote row per channel
+    @in_database_thread
+    def set_vote(self, session, channel_id, member_id, suggestion_id):
+        old_vote = session.query(Vote).filter(Vote.channel_id == channel_id, Vote.member_id == member_id).first()
+        if old_vote is None:
+            session.add(Vote(channel_id=channel_id, member_id=member_id, suggestion_id=suggestion_id))
+        else:
+            old_vote.suggestion_id = suggestion_id
+        session.commit()
+
+    @in_database_thread
+    def get_current_vote_totals(self, session, channel_id):
+        if session.query(Vote).filter(Vote.channel_id == channel_id).first() is None:
+            return None
+        return session.query(
+            Suggestion.id,
+            Suggestion.vote_number,
+            Game.bgg_id.label("game_id"),
+            Game.title,
+            Game.url,
+            func.sum(Member.power).label('vote_quantity')) \
+            .join(Game) \
+            .outerjoin(Vote).outerjoin(Member) \
+            .filter(Suggestion.channel_id == channel_id) \
+            .group_by(Suggestion.id) \
+            .order_by(desc('vote_quantity')) \
+            .all()
+
+    # loads the poll state once, later votes are applied to the tally as they come in
+    @in_database_thread
+    def load_vote_tally(self, session, channel_id):
+        suggestions = session.query(
+            Suggestion.id,
+            Suggestion.vote_number,
+            Game.bgg_id.label("game_id"),
+            Game.title,
+            Game.url) \
+            .join(Game) \
+            .filter(Suggestion.channel_id == channel_id) \
+            .order_by(Suggestion.id) \
+            .all()
+        votes = session.query(Vote.member_id, Vote.suggestion_id, Member.power) \
+            .join(Member, Member.id == Vote.member_id) \
+            .filter(Vote.channel_id == channel_id).all()
+        return VoteTally(suggestions, votes)
+
+    @in_database_thread
+    def get_suggestion_tally_row(self, session, suggestion_id):
+        return session.query(
+            Suggestion.id,
+            Suggestion.vote_number,
+            Game.bgg_id.label("game_id"),
+            Game.title,
+            Game.url) \
+            .join(Game) \
+            .filter(Suggestion.id == suggestion_id) \
+            .first()
+
+    # marks the channel's poll as closing, returns False if it wasn't active
+    # the update is atomic, so when a command, a scheduled job or another worker process close the same poll
+    # at once, exactly one of them gets True and goes on to close it
+    @staticmethod
+    def claim_poll(session, channel_id):
+        return session.query(GamePoll).filter(GamePoll.channel_id == channel_id, GamePoll.active) \
+            .update({GamePoll.active: False}, synchronize_session=False) > 0
+
+    # returns False if there was no active poll to end
+    @in_database_thread
+    def end_poll_without_winner(self, session, channel_id):
+        if not self.claim_poll(session, channel_id):
+            return False
+        session.query(GamePoll).filter(GamePoll.channel_id == channel_id).delete(synchronize_session=False)
+        session.query(Vote).filter(Vote.channel_id == channel_id).delete(synchronize_session="fetch")
+        session.commit()
+        return True
+
+    # returns False if there was no active poll to close
+    async def finalize_poll(self, channel_id, winner_id):
+        if not await self.run(self.finalize_poll_in_database, channel_id, winner_id):
+            return False
+        # voting power changed for everyone who voted
+        self.members.clear()
+        return True
+
+    # closes the poll in one transaction, every step is a single statement however many members voted
+    def finalize_poll_in_database(self, session, channel_id, winner_id):
+        if not self.claim_poll(session, channel_id):
+            return False
+
+        channel_votes = session.query(Vote.member_id).filter(Vote.channel_id == channel_id)
+        winning_voters = channel_votes.filter(Vote.suggestion_id == winner_id)
+        losing_voters = channel_votes.filter(Vote.suggestion_id != winner_id)
+
+        # if your vote lost, increase vote power, if it won, reset it
+        session.query(Member).filter(Member.id.in_(losing_voters)) \
+            .update({Member.power: Member.power + 1}, synchronize_session=False)
+        session.query(Member).filter(Member.id.in_(winning_voters)) \
+            .update({Member.power: 1}, synchronize_session=False)
+
+        session.query(Vote).filter(Vote.channel_id == channel_id).delete(synchronize_session="fetch")
+
+        # the winner's losing streak resets, everything else lost once more
+        channel_suggestions = session.query(Suggestion).filter(Suggestion.channel_id == channel_id)
+        channel_suggestions.update({
+            Suggestion.number_lost: case({winner_id: 0}, value=Suggestion.id, else_=Suggestion.number_lost + 1)
+        }, synchronize_session=False)
+        # delete suggestion if it has lost 5 or more times in a row
+        retired_vote_numbers = [result.vote_number for result in session.query(Suggestion.vote_number)
+                                .filter(Suggestion.channel_id == channel_id, Suggestion.number_lost >= 5)]
+        channel_suggestions.filter(Suggestion.number_lost >= 5).delete(synchronize_session="fetch")
+
+        game_poll = session.query(GamePoll).filter(GamePoll.channel_id == channel_id).first()
+        if game_poll is not None:
+            # Update the event: The game has been decided
+            winning_game_id = session.query(Suggestion.game_id).filter(Suggestion.id == winner_id).scalar()
+            this_event = session.query(Event).filter(Event.id == game_poll.event_id).first()
+            if this_event is None:
+                print("Missing event in finalize_vote")
+            else:
+                this_event.game_decided = True
+                this_event.winning_game_id = winning_game_id
+            session.delete(game_poll)
+        session.commit()
+
+        vote_numbers = self.get_vote_numbers(channel_id)
+        for vote_number in retired_vote_numbers:
+            vote_numbers.release(vote_number)
+        return True
+
+    # Messages
+
+    @in_database_thread
+    def add_message(self, session, channel_id, message_id):
+        session.add(Message(channel_id=channel_id, message_id=message_id))
+        session.commit()
+
+    @in_database_thread
+    def get_saved_messages(self, session, channel_id):
+        return session.query(Message).filter(Message.channel_id == channel_id).all()
+
+    @in_database_thread
+    def delete_saved_messages(self, session, ids):
+        session.query(Message).filter(Message.id.in_(ids)).delete(synchronize_session=False)
+        session.commit()
+
+    @in_database_thread
+    def clear_saved_messages(self, session, channel_id):
+        for item in session.query(Message).filter(Message.channel_id == channel_id).all():
+            session.delete(item)
+        session.commit()
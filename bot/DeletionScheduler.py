@@ -0,0 +1,142 @@
+import asyncio
+import heapq
+import math
+import time
+from datetime import datetime
+
+import discord
+
+from bot.DataAccess import outside_unit_of_work
+from bot.models.PendingDeletion import PendingDeletion
+
+# Discord's bulk delete takes at most this many messages, and only ones younger than 14 days
+BULK_DELETE_LIMIT = 100
+BULK_DELETE_MAX_AGE = 14 * 24 * 60 * 60
+
+
+# deletes by id without fetching the messages first, returns the ids that are confirmed gone
+# messages that are already deleted count as gone, ones Discord refused to delete are left out
+async def delete_messages_by_id(channel, message_ids):
+    # a snowflake's top bits are its creation time in milliseconds since the Discord epoch,
+    # a minute of margin keeps messages right at the limit out of the bulk requests
+    bulk_cutoff = (time.time() - BULK_DELETE_MAX_AGE + 60) * 1000 - discord.utils.DISCORD_EPOCH
+    recent_ids = [message_id for message_id in message_ids if message_id >> 22 > bulk_cutoff]
+    single_ids = [message_id for message_id in message_ids if message_id >> 22 <= bulk_cutoff]
+
+    deleted_ids = []
+    for start in range(0, len(recent_ids), BULK_DELETE_LIMIT):
+        chunk = recent_ids[start:start + BULK_DELETE_LIMIT]
+        try:
+            await channel.delete_messages([discord.Object(id=message_id) for message_id in chunk])
+        except discord.errors.HTTPException:
+            # a bulk delete fails as a whole, e.g. if one message is already gone, so retry one by one
+            single_ids.extend(chunk)
+            continue
+        deleted_ids.extend(chunk)
+
+    for message_id in single_ids:
+        try:
+            # a single message is deleted through the one message endpoint, which has no age limit
+            await channel.delete_messages([discord.Object(id=message_id)])
+        except discord.errors.NotFound:
+            pass
+        except discord.errors.HTTPException as error:
+            print("Couldn't delete message {0}: {1}".format(message_id, error))
+            continue
+        deleted_ids.append(message_id)
+    return deleted_ids
+
+
+# deletes ephemeral replies once their timeout is up, one task works through a heap of due times
+# instead of every reply keeping its handler asleep until it can delete its own message
+class DeletionScheduler:
+    def __init__(self, database, get_channel, tick=1):
+        self.database = database
+        self.get_channel = get_channel
+        # due times are rounded up to the tick, so replies expiring in the same tick are deleted together
+        self.tick = tick
+
+        # entries are (delete_at, row id, channel_id, message_id)
+        self.heap = []
+        self.wakeup = asyncio.Event()
+        self.loaded = False
+        self.task = None
+
+    # on_ready runs again on every reconnect, the deletions saved before a restart are only loaded once
+    # deletions in channels this worker can't see are left to the worker serving them
+    async def start(self):
+        if not self.loaded:
+            self.loaded = True
+            for row in await self.database.run(self.get_pending_deletions):
+                if self.get_channel(row.channel_id) is None:
+                    continue
+                heapq.heappush(self.heap, (row.delete_at, row.id, row.channel_id, row.message_id))
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(outside_unit_of_work(self.run()))
+        self.wakeup.set()
+
+    def close(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    async def schedule(self, channel, message, timeout):
+        now = datetime.now().timestamp()
+        delete_at = datetime.fromtimestamp(math.ceil((now + timeout) / self.tick) * self.tick)
+        row_id = await self.database.run(self.add_pending_deletion, channel.id, message.id, delete_at)
+        heapq.heappush(self.heap, (delete_at, row_id, channel.id, message.id))
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(outside_unit_of_work(self.run()))
+        self.wakeup.set()
+
+    async def run(self):
+        while True:
+            if not self.heap:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            delay = (self.heap[0][0] - datetime.now()).total_seconds()
+            if delay > 0:
+                # checked again every tick, so a reply scheduled ahead of the current first one isn't missed
+                await asyncio.sleep(min(delay, self.tick))
+                continue
+
+            now = datetime.now()
+            due = []
+            while self.heap and self.heap[0][0] <= now:
+                due.append(heapq.heappop(self.heap))
+            try:
+                await self.delete_due(due)
+            except Exception as error:
+                print("Deleting expired messages failed: {0!r}".format(error))
+            # failed deletions aren't retried, they would most likely fail again after every restart
+            try:
+                await self.database.run(self.remove_pending_deletions, [entry[1] for entry in due])
+            except Exception as error:
+                print("Removing expired messages from the database failed: {0!r}".format(error))
+
+    async def delete_due(self, due):
+        message_ids_by_channel = {}
+        for delete_at, row_id, channel_id, message_id in due:
+            message_ids_by_channel.setdefault(channel_id, []).append(message_id)
+
+        for channel_id, message_ids in message_ids_by_channel.items():
+            channel = self.get_channel(channel_id)
+            if channel is not None:
+                await delete_messages_by_id(channel, message_ids)
+
+    @staticmethod
+    def get_pending_deletions(session):
+        return session.query(PendingDeletion).all()
+
+    @staticmethod
+    def add_pending_deletion(session, channel_id, message_id, delete_at):
+        pending_deletion = PendingDeletion(channel_id=channel_id, message_id=message_id, delete_at=delete_at)
+        session.add(pending_deletion)
+        session.commit()
+        return pending_deletion.id
+
+    @staticmethod
+    def remove_pending_deletions(session, row_ids):
+        session.query(PendingDeletion).filter(PendingDeletion.id.in_(row_ids)).delete(synchronize_session=False)
+        session.commit()
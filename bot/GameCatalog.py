@@ -0,0 +1,108 @@
+from difflib import SequenceMatcher
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+
+class GameCatalog:
+    def __init__(self, database, match_threshold=0.8, candidate_limit=20):
+        self.database = database
+        self.match_threshold = match_threshold
+        self.candidate_limit = candidate_limit
+        self.fts_enabled = None
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0
+        }
+
+    # rows are keyed by rowid = bgg_id
+    # the FTS5 table is created on first use, after run.py has created the regular tables
+    def ensure_index(self, session):
+        if self.fts_enabled is not None:
+            return
+        if session.bind.dialect.name != "sqlite":
+            print("Game catalog using LIKE search on " + session.bind.dialect.name)
+            self.fts_enabled = False
+            return
+        try:
+            session.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS game_catalog "
+                "USING fts5(title, alternate_names, tokenize='trigram')"))
+            if session.execute(text("SELECT count(*) FROM game_catalog")).scalar() == 0:
+                session.execute(text(
+                    "INSERT INTO game_catalog (rowid, title, alternate_names) "
+                    "SELECT bgg_id, title, '' FROM games WHERE bgg_id IS NOT NULL"))
+            session.commit()
+            self.fts_enabled = True
+        except OperationalError as error:
+            session.rollback()
+            print("Game catalog falling back to LIKE search: " + str(error))
+            self.fts_enabled = False
+
+    @staticmethod
+    def normalize(name):
+        return " ".join(name.lower().split())
+
+    async def add(self, bgg_id, title, alternate_names=()):
+        await self.database.run(self.add_in_database, bgg_id, title, alternate_names)
+
+    def add_in_database(self, session, bgg_id, title, alternate_names):
+        self.ensure_index(session)
+        if not self.fts_enabled:
+            return
+        row = session.execute(text("SELECT alternate_names FROM game_catalog WHERE rowid = :bgg_id"),
+                              {"bgg_id": bgg_id}).first()
+        names = [] if row is None else [name for name in row.alternate_names.split("\n") if name]
+        for name in alternate_names:
+            if name and name != title and name not in names:
+                names.append(name)
+        if row is None:
+            session.execute(text("INSERT INTO game_catalog (rowid, title, alternate_names) "
+                                 "VALUES (:bgg_id, :title, :alternate_names)"),
+                            {"bgg_id": bgg_id, "title": title, "alternate_names": "\n".join(names)})
+        else:
+            session.execute(text("UPDATE game_catalog SET title = :title, alternate_names = :alternate_names "
+                                 "WHERE rowid = :bgg_id"),
+                            {"title": title, "alternate_names": "\n".join(names), "bgg_id": bgg_id})
+        session.commit()
+
+    # returns the bgg_id of the closest known game, or None if nothing is close enough
+    async def search(self, query):
+        query = self.normalize(query)
+        if not query:
+            return None
+
+        candidates = await self.database.run(self.get_candidates, query)
+        best_bgg_id = None
+        best_score = 0
+        for candidate in candidates:
+            for name in [candidate.title] + candidate.alternate_names.split("\n"):
+                if not name:
+                    continue
+                score = SequenceMatcher(None, query, self.normalize(name)).ratio()
+                if score > best_score:
+                    best_bgg_id = candidate.bgg_id
+                    best_score = score
+
+        if best_score < self.match_threshold:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return str(best_bgg_id)
+
+    def get_candidates(self, session, query):
+        self.ensure_index(session)
+        if self.fts_enabled and len(query) >= 3:
+            # any shared trigram makes a candidate, bm25 puts the closest ones first
+            trigrams = {query[i:i + 3] for i in range(len(query) - 2)}
+            match = " OR ".join('"' + trigram.replace('"', '""') + '"' for trigram in trigrams)
+            return session.execute(text(
+                "SELECT rowid AS bgg_id, title, alternate_names FROM game_catalog WHERE game_catalog MATCH :match "
+                "ORDER BY rank LIMIT :limit"), {"match": match, "limit": self.candidate_limit}).all()
+        return session.execute(text(
+            "SELECT bgg_id, title, '' AS alternate_names FROM games WHERE lower(title) LIKE :pattern "
+            "LIMIT :limit"), {"pattern": "%" + query + "%", "limit": self.candidate_limit}).all()
+
+    def get_stats_string(self):
+        return "Game catalog: {0} hits, {1} misses".format(self.stats["hits"], self.stats["misses"])
@@ -0,0 +1,64 @@
+import asyncio
+
+from bot.BGGParser import parse_boardgames, parse_collection
+from bot.models.Game import Game
+
+
+class GameImporter:
+    def __init__(self, bgg_client, database, game_catalog, batch_size=20):
+        self.bgg_client = bgg_client
+        self.database = database
+        self.game_catalog = game_catalog
+        self.batch_size = batch_size
+
+    async def get_collection_ids(self, username):
+        page_content = await self.bgg_client.fetch_collection(username)
+        return parse_collection(page_content)
+
+    # progress is an optional coroutine function called with (games fetched, games requested)
+    async def import_games(self, game_ids, progress=None):
+        game_ids = list(dict.fromkeys(str(game_id) for game_id in game_ids))
+        batches = [game_ids[i:i + self.batch_size] for i in range(0, len(game_ids), self.batch_size)]
+        loop = asyncio.get_event_loop()
+        fetched = {"count": 0}
+
+        async def fetch_batch(batch):
+            page_content = await self.bgg_client.fetch_games(batch)
+            # parsing is CPU bound, so each batch is parsed on a worker thread
+            game_infos = await loop.run_in_executor(None, lambda: list(parse_boardgames(page_content)))
+            fetched["count"] += len(batch)
+            if progress is not None:
+                await progress(fetched["count"], len(game_ids))
+            return game_infos
+
+        # the client's connection cap decides how many batches are in flight at once
+        results = await asyncio.gather(*[fetch_batch(batch) for batch in batches])
+        game_infos = [game_info for batch_infos in results for game_info in batch_infos]
+        added, updated = await self.database.run(self.upsert_games, game_infos)
+        for game_info in game_infos:
+            await self.game_catalog.add(int(game_info["id"]), game_info["game_title"], game_info["alternate_names"])
+        return {
+            "added": added,
+            "updated": updated,
+            "not_found": len(game_ids) - len(game_infos)
+        }
+
+    @staticmethod
+    def upsert_games(session, game_infos):
+        bgg_ids = [int(game_info["id"]) for game_info in game_infos]
+        existing_games = {}
+        for game in session.query(Game).filter(Game.bgg_id.in_(bgg_ids)).all():
+            existing_games[game.bgg_id] = game
+
+        added = 0
+        for game_info in game_infos:
+            game = existing_games.get(int(game_info["id"]))
+            if game is None:
+                game = Game()
+                session.add(game)
+                existing_games[int(game_info["id"])] = game
+                added += 1
+            game.set_game_info(game_info)
+            game.bgg_id = int(game_info["id"])
+        session.commit()
+        return added, len(game_infos) - added
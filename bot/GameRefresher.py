@@ -0,0 +1,105 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+
+from bot.BGGClient import BGGError
+from bot.BGGParser import parse_boardgames
+from bot.models.Game import Game
+
+
+class GameRefresher:
+    def __init__(self, bgg_client, database, render_cache, max_age, batch_size=10, interval=600, idle_time=300,
+                 requests_per_hour=6):
+        self.bgg_client = bgg_client
+        self.database = database
+        self.render_cache = render_cache
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self.interval = interval
+        self.idle_time = timedelta(seconds=idle_time)
+        self.requests_per_hour = requests_per_hour
+
+        self.last_activity = datetime.now()
+        self.request_times = deque()
+        self.task = None
+
+    @classmethod
+    def from_config(cls, bgg_client, database, render_cache, config):
+        return cls(
+            bgg_client,
+            database,
+            render_cache,
+            max_age=timedelta(days=config["refresh_max_age"]),
+            batch_size=config["refresh_batch_size"],
+            interval=config["refresh_interval"] * 60,
+            idle_time=config["refresh_idle_time"] * 60,
+            requests_per_hour=config["refresh_requests_per_hour"]
+        )
+
+    # called for every command so refreshes only happen while the channel is quiet
+    def mark_activity(self):
+        self.last_activity = datetime.now()
+
+    # on_ready runs again on every reconnect, so only one worker is ever started
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self.run())
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                refreshed = await self.refresh_stale_games()
+            except BGGError as error:
+                print("Game refresh failed: " + str(error))
+                continue
+            except Exception as error:
+                # e.g. a game BoardGameGeek returns without some field, or a locked database,
+                # the next round tries again instead of the refresher stopping for good
+                print("Game refresh failed: {0!r}".format(error))
+                continue
+            if refreshed:
+                print("Refreshed {0} games from BoardGameGeek".format(refreshed))
+
+    def has_request_budget(self):
+        an_hour_ago = datetime.now() - timedelta(hours=1)
+        while self.request_times and self.request_times[0] < an_hour_ago:
+            self.request_times.popleft()
+        return len(self.request_times) < self.requests_per_hour
+
+    async def refresh_stale_games(self):
+        if datetime.now() - self.last_activity < self.idle_time or not self.has_request_budget():
+            return 0
+
+        stale_ids = await self.database.run(self.get_stale_ids, datetime.now() - self.max_age)
+        if not stale_ids:
+            return 0
+
+        self.request_times.append(datetime.now())
+        page_content = await self.bgg_client.fetch_games(stale_ids)
+        game_infos = {int(game_info["id"]): game_info for game_info in parse_boardgames(page_content)}
+        await self.database.run(self.update_games, stale_ids, game_infos)
+        if game_infos:
+            self.render_cache.invalidate("games")
+        return len(game_infos)
+
+    def get_stale_ids(self, session, stale_before):
+        return [game.bgg_id for game in session.query(Game.bgg_id)
+                .filter(or_(Game.fetched_at.is_(None), Game.fetched_at < stale_before))
+                .order_by(Game.fetched_at)
+                .limit(self.batch_size)
+                .all()]
+
+    @staticmethod
+    def update_games(session, stale_ids, game_infos):
+        for game in session.query(Game).filter(Game.bgg_id.in_(stale_ids)).all():
+            game_info = game_infos.get(game.bgg_id)
+            if game_info is None:
+                # removed from BGG, keep what we have and stop asking for a while
+                game.fetched_at = datetime.now()
+            else:
+                game.set_game_info(game_info)
+                game.bgg_id = int(game_info["id"])
+        session.commit()
@@ -0,0 +1,121 @@
+import asyncio
+import heapq
+from datetime import datetime
+
+from bot.DataAccess import outside_unit_of_work
+from bot.models.ScheduledJob import ScheduledJob
+
+
+# runs poll reminders, poll closes and event reminders at their time from one task
+# jobs are saved in the database, so they survive a restart, and kept in a min-heap by run_at
+# handlers map a job's kind to a coroutine taking the target id, they run in their own unit of work
+# and still have to check their poll or event exists, in case it went away without cancelling its jobs
+class JobScheduler:
+    def __init__(self, database, handlers):
+        self.database = database
+        self.handlers = handlers
+
+        # entries are (run_at, row id, kind, target_id), moved or cancelled jobs leave their old entry behind
+        self.heap = []
+        # the current run_at of every job by row id, entries that don't match it are skipped
+        self.jobs = {}
+        self.wakeup = asyncio.Event()
+        self.loaded = False
+        self.task = None
+
+    # on_ready runs again on every reconnect, the jobs saved before a restart are only loaded once
+    # only jobs of the channels this worker serves are loaded, the other workers run the rest
+    async def start(self, channel_ids):
+        if not self.loaded:
+            self.loaded = True
+            for row in await self.database.run(self.get_scheduled_jobs, channel_ids):
+                self.push(row.run_at, row.id, row.kind, row.target_id)
+        self.ensure_running()
+
+    def close(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    def ensure_running(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(outside_unit_of_work(self.run()))
+        self.wakeup.set()
+
+    def push(self, run_at, row_id, kind, target_id):
+        self.jobs[row_id] = run_at
+        heapq.heappush(self.heap, (run_at, row_id, kind, target_id))
+
+    async def schedule(self, channel_id, kind, target_id, run_at):
+        row_id = await self.database.run(self.save_scheduled_job, channel_id, kind, target_id, run_at)
+        self.push(run_at, row_id, kind, target_id)
+        self.ensure_running()
+
+    async def cancel(self, kind, target_id):
+        row_id = await self.database.run(self.remove_scheduled_job, kind, target_id)
+        self.jobs.pop(row_id, None)
+
+    async def run(self):
+        while True:
+            while self.heap and self.jobs.get(self.heap[0][1]) != self.heap[0][0]:
+                heapq.heappop(self.heap)
+            self.wakeup.clear()
+            if not self.heap:
+                await self.wakeup.wait()
+                continue
+
+            delay = (self.heap[0][0] - datetime.now()).total_seconds()
+            if delay > 0:
+                # a job scheduled ahead of the current first one wakes the task up early
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            run_at, row_id, kind, target_id = heapq.heappop(self.heap)
+            del self.jobs[row_id]
+            try:
+                async with self.database.unit_of_work():
+                    await self.handlers[kind](target_id)
+            except Exception as error:
+                print("Scheduled job {0} for {1} failed: {2!r}".format(kind, target_id, error))
+            # removed once it has run, so a restart in the middle of a job runs it again
+            # a job that failed is removed too, it would only fail again
+            try:
+                await self.database.run(self.remove_scheduled_job_row, row_id, run_at)
+            except Exception as error:
+                print("Couldn't remove scheduled job {0} for {1}: {2!r}".format(kind, target_id, error))
+
+    @staticmethod
+    def get_scheduled_jobs(session, channel_ids):
+        return session.query(ScheduledJob).filter(ScheduledJob.channel_id.in_(channel_ids)).all()
+
+    # moves the job if it is already scheduled, returns its row id
+    @staticmethod
+    def save_scheduled_job(session, channel_id, kind, target_id, run_at):
+        scheduled_job = session.query(ScheduledJob).filter(ScheduledJob.kind == kind,
+                                                           ScheduledJob.target_id == target_id).first()
+        if scheduled_job is None:
+            scheduled_job = ScheduledJob(channel_id=channel_id, kind=kind, target_id=target_id)
+            session.add(scheduled_job)
+        scheduled_job.channel_id = channel_id
+        scheduled_job.run_at = run_at
+        session.commit()
+        return scheduled_job.id
+
+    @staticmethod
+    def remove_scheduled_job(session, kind, target_id):
+        scheduled_job = session.query(ScheduledJob).filter(ScheduledJob.kind == kind,
+                                                           ScheduledJob.target_id == target_id).first()
+        if scheduled_job is None:
+            return None
+        session.delete(scheduled_job)
+        session.commit()
+        return scheduled_job.id
+
+    # only if it hasn't been moved in the meantime
+    @staticmethod
+    def remove_scheduled_job_row(session, row_id, run_at):
+        session.query(ScheduledJob).filter(ScheduledJob.id == row_id, ScheduledJob.run_at == run_at) \
+            .delete(synchronize_session=False)
+        session.commit()
@@ -0,0 +1,71 @@
+import asyncio
+
+import discord
+
+from bot.DataAccess import outside_unit_of_work
+
+
+# the active poll's standings live in one pinned message that is edited in place
+# updates are debounced, so every vote within delay seconds of the first one is shown by a single edit
+class LiveBoard:
+    def __init__(self, render, delay=2.0):
+        self.render = render
+        self.delay = delay
+        self.message = None
+        self.content = None
+        self.dirty = False
+        self.task = None
+
+        self.stats = {
+            "requested": 0,
+            "edits": 0
+        }
+
+    @classmethod
+    def from_config(cls, render, config):
+        return cls(render, delay=config["board_update_delay"])
+
+    # content is what the message currently shows, None if it isn't known, e.g. after a restart
+    def attach(self, message, content=None):
+        self.detach()
+        self.message = message
+        self.content = content
+
+    def detach(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.message = None
+        self.content = None
+        self.dirty = False
+
+    def request_update(self):
+        if self.message is None:
+            return
+        self.stats["requested"] += 1
+        self.dirty = True
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(outside_unit_of_work(self.run()))
+
+    async def run(self):
+        while self.dirty:
+            await asyncio.sleep(self.delay)
+            self.dirty = False
+            content = await self.render()
+            if content == self.content:
+                continue
+            try:
+                await self.message.edit(content=content)
+            except discord.errors.NotFound:
+                # someone deleted the board, the poll goes on without it
+                print("The live board message is gone")
+                self.message = None
+                return
+            except discord.errors.HTTPException as error:
+                print("Couldn't update the live board: {0}".format(error))
+                continue
+            self.content = content
+            self.stats["edits"] += 1
+
+    def get_stats_string(self):
+        return "Live board: {0} updates shown by {1} edits".format(self.stats["requested"], self.stats["edits"])
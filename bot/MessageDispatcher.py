@@ -0,0 +1,134 @@
+import asyncio
+from collections import deque
+
+ANNOUNCEMENT = 0
+EPHEMERAL = 1
+
+# Discord rejects messages longer than this
+MAX_MESSAGE_LENGTH = 2000
+
+
+class OutgoingMessage:
+    def __init__(self, content, kwargs, timeout):
+        self.content = content
+        self.kwargs = kwargs
+        self.timeout = timeout
+        self.future = asyncio.get_event_loop().create_future()
+
+
+class ChannelQueue:
+    def __init__(self):
+        # announcements are always sent before ephemeral replies
+        self.lanes = (deque(), deque())
+        self.send_times = deque()
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+
+# sends every message through a rate limit per channel, so a burst of commands is spread out
+# instead of running into Discord's rate limit
+# Discord allows a burst of messages per window and only resets the window once it has passed,
+# so at most burst messages are sent in any burst / rate seconds
+class MessageDispatcher:
+    def __init__(self, rate=1.0, burst=5):
+        self.rate = rate
+        self.burst = burst
+        self.window = burst / rate
+        self.queues = {}
+
+        self.stats = {
+            "sent": 0,
+            "coalesced": 0
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(rate=config["message_rate"], burst=config["message_burst"])
+
+    async def send(self, channel, content=None, **kwargs):
+        outgoing = OutgoingMessage(content, kwargs, None)
+        self.enqueue(channel, ANNOUNCEMENT, outgoing)
+        return await outgoing.future
+
+    # returns the message and how long it should stay up, which is the longest timeout of
+    # every reply it was merged with, only the first of the merged replies still waiting gets the
+    # timeout and the others get None, so the message is only scheduled for deletion once
+    async def send_ephemeral(self, channel, content, timeout):
+        outgoing = OutgoingMessage(content, {}, timeout)
+        self.enqueue(channel, EPHEMERAL, outgoing)
+        return await outgoing.future
+
+    def enqueue(self, channel, lane, outgoing):
+        queue = self.queues.get(channel.id)
+        if queue is None:
+            queue = self.queues[channel.id] = ChannelQueue()
+        if queue.task is None or queue.task.done():
+            queue.task = asyncio.ensure_future(self.run(channel, queue))
+        queue.lanes[lane].append(outgoing)
+        queue.wakeup.set()
+
+    async def run(self, channel, queue):
+        while True:
+            if not queue.lanes[ANNOUNCEMENT] and not queue.lanes[EPHEMERAL]:
+                queue.wakeup.clear()
+                await queue.wakeup.wait()
+                continue
+
+            await self.wait_for_slot(queue)
+            if queue.lanes[ANNOUNCEMENT]:
+                batch = [queue.lanes[ANNOUNCEMENT].popleft()]
+            elif len(queue.lanes[EPHEMERAL]) <= self.burst - len(queue.send_times):
+                batch = [queue.lanes[EPHEMERAL].popleft()]
+            else:
+                batch = self.take_ephemeral_batch(queue.lanes[EPHEMERAL])
+
+            content = "\n".join(outgoing.content for outgoing in batch) if len(batch) > 1 else batch[0].content
+            try:
+                message = await channel.send(content=content, **batch[0].kwargs)
+            except Exception as error:
+                for outgoing in batch:
+                    if not outgoing.future.done():
+                        outgoing.future.set_exception(error)
+                continue
+
+            self.stats["sent"] += 1
+            self.stats["coalesced"] += len(batch) - 1
+            if batch[0].timeout is None:
+                if not batch[0].future.done():
+                    batch[0].future.set_result(message)
+                continue
+            timeout = max(outgoing.timeout for outgoing in batch)
+            for outgoing in batch:
+                if not outgoing.future.done():
+                    outgoing.future.set_result((message, timeout))
+                    timeout = None
+
+    # once there are more replies waiting than messages left in the window, they all go out as one
+    @staticmethod
+    def take_ephemeral_batch(lane):
+        batch = [lane.popleft()]
+        length = len(batch[0].content)
+        while lane and length + 1 + len(lane[0].content) <= MAX_MESSAGE_LENGTH:
+            length += 1 + len(lane[0].content)
+            batch.append(lane.popleft())
+        return batch
+
+    async def wait_for_slot(self, queue):
+        loop = asyncio.get_event_loop()
+        while True:
+            now = loop.time()
+            while queue.send_times and now - queue.send_times[0] >= self.window:
+                queue.send_times.popleft()
+            if len(queue.send_times) < self.burst:
+                queue.send_times.append(now)
+                return
+            await asyncio.sleep(self.window - (now - queue.send_times[0]))
+
+    def close(self):
+        for queue in self.queues.values():
+            if queue.task is not None:
+                queue.task.cancel()
+
+    def get_stats_string(self):
+        return "Messages: {0} sent, {1} replies merged into others".format(self.stats["sent"],
+                                                                           self.stats["coalesced"])
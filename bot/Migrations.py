@@ -0,0 +1,222 @@
+from sqlalchemy import inspect, text
+
+from bot.Base import Base
+# every model is imported so create_all and the table rebuilds see the whole schema
+from bot.models.CacheEntry import CacheEntry
+from bot.models.Event import Event
+from bot.models.Game import Game
+from bot.models.GamePoll import GamePoll
+from bot.models.Member import Member
+from bot.models.Messages import Message
+from bot.models.PendingDeletion import PendingDeletion
+from bot.models.RSVP import RSVP
+from bot.models.ScheduledJob import ScheduledJob
+from bot.models.Suggestion import Suggestion
+from bot.models.Vote import Vote
+
+
+# creates any missing tables, then applies every migration newer than the database's schema_version
+# each migration runs in its own transaction and is safe to run against an already up to date database,
+# since databases made before schema_version existed start from version 0
+def migrate(engine):
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+        current_version = connection.execute(text("SELECT max(version) FROM schema_version")).scalar() or 0
+
+    for version, migration in enumerate(MIGRATIONS, start=1):
+        if version <= current_version:
+            continue
+        with engine.begin() as connection:
+            migration(connection)
+            connection.execute(text("INSERT INTO schema_version (version) VALUES (:version)"), {"version": version})
+        print("Applied database migration {0}: {1}".format(version, migration.__name__))
+
+
+# rows made before the bot could be bound to several channels belong to the channel it used to be bound to
+# scheduled jobs follow the poll or event they belong to, which only has its channel from here on
+def assign_default_channel(engine, channel_id):
+    with engine.begin() as connection:
+        for model in PARTITIONED_MODELS:
+            connection.execute(text("UPDATE " + model.__tablename__ + " SET channel_id = :channel_id "
+                                    "WHERE channel_id IS NULL"), {"channel_id": channel_id})
+        assign_scheduled_job_channels(connection)
+
+
+# members used to be looked up by name, so a renamed user got a second row with the same discord_id
+# the newest row has the current name and power, everything pointing at the older rows is moved to it
+def merge_duplicate_members(connection):
+    duplicates = connection.execute(text(
+        "SELECT discord_id, max(id) AS keep_id FROM members WHERE discord_id IS NOT NULL "
+        "GROUP BY discord_id HAVING count(*) > 1")).all()
+    for duplicate in duplicates:
+        parameters = {"discord_id": duplicate.discord_id, "keep_id": duplicate.keep_id}
+        for table, column in (("rsvps", "member_id"), ("votes", "member_id"), ("suggestions", "author_id")):
+            connection.execute(text(
+                "UPDATE " + table + " SET " + column + " = :keep_id WHERE " + column + " IN "
+                "(SELECT id FROM members WHERE discord_id = :discord_id AND id != :keep_id)"), parameters)
+        connection.execute(text("DELETE FROM members WHERE discord_id = :discord_id AND id != :keep_id"),
+                           parameters)
+    if duplicates:
+        print("Merged duplicate members for {0} Discord accounts".format(len(duplicates)))
+    replace_with_unique_index(connection, Member, ["discord_id"])
+
+
+def add_rsvp_counts(connection):
+    add_missing_column(connection, "events", "rsvp_count INTEGER DEFAULT 0")
+    count_rsvps(connection)
+
+
+def add_game_fetched_at(connection):
+    if add_missing_column(connection, "games", "fetched_at DATETIME"):
+        connection.execute(text("CREATE INDEX ix_games_fetched_at ON games (fetched_at)"))
+
+
+# one RSVP per member and event, one vote per member, and each game suggested once
+def add_unique_lookup_indexes(connection):
+    connection.execute(text(
+        "DELETE FROM rsvps WHERE id NOT IN (SELECT min(id) FROM rsvps GROUP BY event_id, member_id)"))
+    count_rsvps(connection)
+    replace_with_unique_index(connection, RSVP, ["event_id", "member_id"])
+
+    connection.execute(text(
+        "DELETE FROM votes WHERE id NOT IN (SELECT max(id) FROM votes GROUP BY member_id)"))
+    replace_with_unique_index(connection, Vote, ["member_id"])
+
+    duplicates = "SELECT id FROM suggestions WHERE id NOT IN (SELECT min(id) FROM suggestions GROUP BY game_id)"
+    connection.execute(text("DELETE FROM votes WHERE suggestion_id IN (" + duplicates + ")"))
+    connection.execute(text("DELETE FROM suggestions WHERE id IN (" + duplicates + ")"))
+    replace_with_unique_index(connection, Suggestion, ["game_id"])
+
+
+def add_poll_board_message(connection):
+    add_missing_column(connection, "game_polls", "board_message_id INTEGER")
+
+
+# a poll started before scheduled jobs existed was closed by on_ready, now it needs a job to close it
+def schedule_active_polls(connection):
+    ScheduledJob.__table__.create(connection, checkfirst=True)
+    connection.execute(text(
+        "INSERT INTO scheduled_jobs (kind, target_id, run_at) "
+        "SELECT 'poll_close', id, finish_time FROM game_polls WHERE active AND id NOT IN "
+        "(SELECT target_id FROM scheduled_jobs WHERE kind = 'poll_close')"))
+
+
+# members, games suggested, vote numbers and votes become unique within a channel
+def partition_by_channel(connection):
+    for model in PARTITIONED_MODELS:
+        add_missing_column(connection, model.__tablename__, "channel_id INTEGER")
+    connection.execute(text("DROP INDEX IF EXISTS ix_members_discord_id"))
+    connection.execute(text("DROP INDEX IF EXISTS ix_suggestions_game_id"))
+    connection.execute(text("DROP INDEX IF EXISTS ix_votes_member_id"))
+    drop_unique_constraint(connection, Suggestion, ["vote_number"])
+    for model in PARTITIONED_MODELS:
+        for index in model.__table__.indexes:
+            index.create(connection, checkfirst=True)
+
+
+# each worker process only runs the jobs of the channels it serves
+def add_scheduled_job_channels(connection):
+    if add_missing_column(connection, "scheduled_jobs", "channel_id INTEGER"):
+        connection.execute(text("CREATE INDEX ix_scheduled_jobs_channel_id ON scheduled_jobs (channel_id)"))
+    assign_scheduled_job_channels(connection)
+
+
+# Discord IDs don't fit in a 32 bit INTEGER, SQLite's INTEGER is already 64 bit
+def widen_discord_ids(connection):
+    if connection.dialect.name == "sqlite":
+        return
+    for table, column in DISCORD_ID_COLUMNS:
+        if connection.dialect.name == "mysql":
+            connection.execute(text("ALTER TABLE " + table + " MODIFY " + column + " BIGINT"))
+        else:
+            connection.execute(text("ALTER TABLE " + table + " ALTER COLUMN " + column + " TYPE BIGINT"))
+
+
+# append new migrations to the end, a migration's position is its version number
+MIGRATIONS = [
+    merge_duplicate_members,
+    add_rsvp_counts,
+    add_game_fetched_at,
+    add_unique_lookup_indexes,
+    add_poll_board_message,
+    schedule_active_polls,
+    partition_by_channel,
+    add_scheduled_job_channels,
+    widen_discord_ids
+]
+
+PARTITIONED_MODELS = [Member, Event, GamePoll, Suggestion, Vote, Message]
+
+DISCORD_ID_COLUMNS = [
+    ("members", "channel_id"),
+    ("members", "discord_id"),
+    ("events", "channel_id"),
+    ("game_polls", "channel_id"),
+    ("game_polls", "board_message_id"),
+    ("suggestions", "channel_id"),
+    ("votes", "channel_id"),
+    ("messages", "channel_id"),
+    ("messages", "message_id"),
+    ("pending_deletions", "channel_id"),
+    ("pending_deletions", "message_id"),
+    ("scheduled_jobs", "channel_id")
+]
+
+
+# returns True if the column had to be added
+def add_missing_column(connection, table, column_definition):
+    column_name = column_definition.split()[0]
+    if column_name in [column["name"] for column in inspect(connection).get_columns(table)]:
+        return False
+    connection.execute(text("ALTER TABLE " + table + " ADD COLUMN " + column_definition))
+    return True
+
+
+# create_all doesn't change existing indexes, so a non-unique index on the same columns is replaced
+# with the unique one declared on the model
+def replace_with_unique_index(connection, model, column_names):
+    for existing_index in inspect(connection).get_indexes(model.__tablename__):
+        if existing_index["column_names"] == column_names and not existing_index["unique"]:
+            connection.execute(text("DROP INDEX " + existing_index["name"]))
+    for index in model.__table__.indexes:
+        if [column.name for column in index.columns] == column_names:
+            index.create(connection, checkfirst=True)
+
+
+# SQLite can't drop a constraint, so there the table is copied aside, created again from the model and refilled
+def drop_unique_constraint(connection, model, column_names):
+    table = model.__tablename__
+    for constraint in inspect(connection).get_unique_constraints(table):
+        if constraint["column_names"] != column_names:
+            continue
+        if connection.dialect.name != "sqlite":
+            connection.execute(text("ALTER TABLE " + table + " DROP CONSTRAINT " + constraint["name"]))
+            continue
+        columns = ", ".join(column["name"] for column in inspect(connection).get_columns(table))
+        connection.execute(text("CREATE TABLE " + table + "_old AS SELECT * FROM " + table))
+        connection.execute(text("DROP TABLE " + table))
+        model.__table__.create(connection)
+        connection.execute(text("INSERT INTO " + table + " (" + columns + ") SELECT " + columns + " FROM " + table +
+                                "_old"))
+        connection.execute(text("DROP TABLE " + table + "_old"))
+
+
+# a job without a channel takes the channel of its poll or event, if that has one yet
+def assign_scheduled_job_channels(connection):
+    connection.execute(text(
+        "UPDATE scheduled_jobs SET channel_id = (SELECT channel_id FROM game_polls "
+        "WHERE game_polls.id = scheduled_jobs.target_id) "
+        "WHERE channel_id IS NULL AND kind IN ('poll_reminder', 'poll_close')"))
+    connection.execute(text(
+        "UPDATE scheduled_jobs SET channel_id = (SELECT channel_id FROM events "
+        "WHERE events.id = scheduled_jobs.target_id) "
+        "WHERE channel_id IS NULL AND kind = 'event_reminder'"))
+
+
+# recounts every event's RSVPs, returns how many counters were wrong
+def count_rsvps(connection):
+    return connection.execute(text(
+        "UPDATE events SET rsvp_count = (SELECT count(*) FROM rsvps WHERE rsvps.event_id = events.id) "
+        "WHERE rsvp_count IS NULL OR rsvp_count != (SELECT count(*) FROM rsvps WHERE rsvps.event_id = events.id)"
+    )).rowcount
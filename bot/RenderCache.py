@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from bot.LRUCache import LRUCache
+
+
+# keeps the rendered output of a view until the data it was rendered from changes
+# every write bumps the version of the data it touched, a view is rendered again once any version it
+# depends on has moved, or once its expiry time has passed
+class RenderCache:
+    def __init__(self, max_size=1024):
+        self.versions = {}
+        self.entries = LRUCache(max_size)
+
+        # hits and misses by view
+        self.stats = {}
+
+    def invalidate(self, data, key=None):
+        self.versions[(data, key)] = self.versions.get((data, key), 0) + 1
+
+    # render returns the output and the time it stops being valid, or None if only writes change it
+    # versions are read before rendering, so a write that lands while rendering makes the next get render again
+    async def get(self, view, key, depends_on, render):
+        stats = self.stats.setdefault(view, {"hits": 0, "misses": 0})
+        version = tuple(self.versions.get(data, 0) for data in depends_on)
+        entry = self.entries.get((view, key))
+        if entry is not None and entry[0] == version and (entry[2] is None or datetime.now() < entry[2]):
+            stats["hits"] += 1
+            return entry[1]
+
+        stats["misses"] += 1
+        output, expires_at = await render()
+        self.entries.set((view, key), (version, output, expires_at))
+        return output
+
+    def get_stats_string(self):
+        views = []
+        for view, stats in sorted(self.stats.items()):
+            hit_rate = stats["hits"] / (stats["hits"] + stats["misses"]) * 100
+            views.append("{0} {1:.0f}% of {2}".format(view, hit_rate, stats["hits"] + stats["misses"]))
+        if not views:
+            return "Rendered views: none shown yet"
+        return "Rendered views served from cache: " + ", ".join(views)
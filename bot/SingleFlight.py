@@ -0,0 +1,36 @@
+import asyncio
+
+from bot.DataAccess import outside_unit_of_work
+
+
+class SingleFlight:
+    def __init__(self):
+        self._in_flight = {}
+
+        self.stats = {
+            "calls": 0,
+            "coalesced": 0
+        }
+
+    # runs function(*args) once per key at a time, callers arriving while it runs share its result
+    async def do(self, key, function, *args):
+        self.stats["calls"] += 1
+        future = self._in_flight.get(key)
+        if future is None:
+            # the first caller's command may be done before the function is
+            future = asyncio.ensure_future(outside_unit_of_work(function(*args)))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done_future: self._forget(key, done_future))
+        else:
+            self.stats["coalesced"] += 1
+
+        # shielded so one cancelled caller doesn't cancel the fetch for everyone else
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+
+    def get_stats_string(self):
+        return "Lookups: {0} requested, {1} coalesced into an in-flight lookup".format(
+            self.stats["calls"], self.stats["coalesced"])
@@ -1,33 +1,60 @@
 import asyncio
 import configparser
-import html
 import re
 from datetime import datetime, timedelta
 
 import discord
-import requests
 from aiohttp import ClientOSError
-from bs4 import BeautifulSoup
-from sqlalchemy import func, desc
 
-from bot.models.Messages import Message
-from bot.Base import Session
-from bot.models.Event import Event
-from bot.models.Game import Game
-from bot.models.GamePoll import GamePoll
-from bot.models.Member import Member
-from bot.models.RSVP import RSVP
-from bot.models.Suggestion import Suggestion
-from bot.models.Vote import Vote
-
-
-class TabletopBot(discord.Client):
-    def __init__(self):
-        self.session = Session()
-
-        config_file = "config\\options.ini"
-        self.config = self.open_config(config_file)
-        self.bound_channel = None
+from bot.Base import create_database_engine
+from bot.BGGCache import BGGCache
+from bot.BGGClient import BGGClient, BGGError
+from bot.BGGParser import parse_boardgame, parse_search
+from bot.ChannelState import ChannelState
+from bot.DataAccess import DataAccess
+from bot.DeletionScheduler import DeletionScheduler, delete_messages_by_id
+from bot.GameCatalog import GameCatalog
+from bot.GameImporter import GameImporter
+from bot.GameRefresher import GameRefresher
+from bot.JobScheduler import JobScheduler
+from bot.MessageDispatcher import MAX_MESSAGE_LENGTH, MessageDispatcher
+from bot.RenderCache import RenderCache
+from bot.SingleFlight import SingleFlight
+
+
+class TabletopBot(discord.AutoShardedClient):
+    config_file = "config\\options.ini"
+
+    # shard_ids is the part of the bot's shards this process runs, None runs all of them
+    def __init__(self, shard_ids=None, shard_count=None):
+        self.config = self.open_config(self.config_file)
+        self.engine = create_database_engine(self.config)
+        self.database = DataAccess(member_cache_size=self.config["member_cache_size"])
+
+        self.message_dispatcher = MessageDispatcher.from_config(self.config)
+        self.deletion_scheduler = DeletionScheduler(self.database, lambda channel_id: self.get_channel(channel_id))
+        self.job_scheduler = JobScheduler(self.database, {
+            "poll_reminder": self.remind_poll,
+            "poll_close": self.close_poll,
+            "event_reminder": self.remind_event
+        })
+        self.bgg_client = BGGClient.from_config(self.config)
+        self.bgg_cache = BGGCache.from_config(self.database, self.config)
+        self.game_catalog = GameCatalog(self.database, match_threshold=self.config["catalog_match_threshold"])
+        self.single_flight = SingleFlight()
+        self.game_importer = GameImporter(self.bgg_client, self.database, self.game_catalog,
+                                          batch_size=self.config["bgg_import_batch_size"])
+        # help, event lists, suggestion lists and game embeds are only rendered again once their data changes
+        self.render_cache = RenderCache()
+        self.game_refresher = GameRefresher.from_config(self.bgg_client, self.database, self.render_cache,
+                                                        self.config)
+        # ChannelStates by channel_id, a single ID in MentionGroupID is used for every channel
+        self.channels = {}
+        mention_group_ids = self.config["mention_group_ids"]
+        for index, channel_id in enumerate(self.config["bound_channels"]):
+            mention_group_id = mention_group_ids[index] if len(mention_group_ids) > 1 else mention_group_ids[0]
+            self.channels[channel_id] = ChannelState.from_config(channel_id, mention_group_id, self.get_board_string,
+                                                                 self.config)
 
         self.available_commands = {
             "help": self.help,
@@ -45,10 +72,17 @@ class TabletopBot(discord.Client):
             "start_vote": self.start_vote,
             "clear_suggestions": self.clear_suggestions,
             "clear_messages": self.clear_messages,
-            "end_vote": self.end_vote
+            "end_vote": self.end_vote,
+            "import_games": self.import_games,
+            "repair_counters": self.repair_counters,
+            "stats": self.stats
         }
 
-        super().__init__()
+        # the game library is shared by every worker process, so only the one running shard 0 refreshes it
+        self.refreshes_games = shard_ids is None or 0 in shard_ids
+
+        # the bot runs on discord.py 1.x, where the default intents still deliver message content
+        super().__init__(shard_ids=shard_ids, shard_count=shard_count, intents=discord.Intents.default())
 
     def run(self):
         try:
@@ -67,29 +101,82 @@ class TabletopBot(discord.Client):
             "_login_token": config_parser.get('Credentials', 'Token'),
             "owner_id": int(config_parser.get('Permissions', 'OwnerID')),
             "command_prefix": config_parser.get('Chat', 'CommandPrefix'),
-            "bound_channels": int(config_parser.get('Chat', 'BindToChannels')),
-            "mention_group_id": config_parser.get('Chat', 'MentionGroupID')
+            "bound_channels": [int(channel_id) for channel_id in
+                               config_parser.get('Chat', 'BindToChannels').replace(",", " ").split()],
+            "mention_group_ids": config_parser.get('Chat', 'MentionGroupID').replace(",", " ").split(),
+            "message_rate": config_parser.getfloat('Chat', 'MessagesPerSecond', fallback=1.0),
+            "message_burst": config_parser.getint('Chat', 'MessageBurst', fallback=5),
+            "board_update_delay": config_parser.getfloat('Chat', 'BoardUpdateDelay', fallback=2.0),
+            "event_reminder_hours": config_parser.getfloat('Chat', 'EventReminderHours', fallback=24),
+            "database_url": config_parser.get('Database', 'URL', fallback="sqlite:///bot.db"),
+            "database_pool_size": config_parser.getint('Database', 'PoolSize', fallback=5),
+            "database_max_overflow": config_parser.getint('Database', 'MaxOverflow', fallback=10),
+            "sqlite_journal_mode": config_parser.get('Database', 'SQLiteJournalMode', fallback="WAL"),
+            "sqlite_synchronous": config_parser.get('Database', 'SQLiteSynchronous', fallback="NORMAL"),
+            "sqlite_cache_size": config_parser.getint('Database', 'SQLiteCacheSize', fallback=16384),
+            "sqlite_mmap_size": config_parser.getint('Database', 'SQLiteMmapSize', fallback=64),
+            "sqlite_busy_timeout": config_parser.getint('Database', 'SQLiteBusyTimeout', fallback=5000),
+            "member_cache_size": config_parser.getint('Database', 'MemberCacheSize', fallback=1024),
+            "shard_count": config_parser.getint('Sharding', 'ShardCount', fallback=0),
+            "worker_processes": config_parser.getint('Sharding', 'WorkerProcesses', fallback=1),
+            "bgg_base_url": config_parser.get('BoardGameGeek', 'BaseURL', fallback="https://boardgamegeek.com"),
+            "bgg_timeout": config_parser.getfloat('BoardGameGeek', 'Timeout', fallback=15),
+            "bgg_max_connections": config_parser.getint('BoardGameGeek', 'MaxConnections', fallback=4),
+            "bgg_max_retries": config_parser.getint('BoardGameGeek', 'MaxRetries', fallback=5),
+            "bgg_retry_delay": config_parser.getfloat('BoardGameGeek', 'RetryDelay', fallback=1.0),
+            "bgg_cache_search_ttl": config_parser.getfloat('BoardGameGeek', 'CacheSearchTTL', fallback=24 * 7),
+            "bgg_cache_game_ttl": config_parser.getfloat('BoardGameGeek', 'CacheGameTTL', fallback=24 * 30),
+            "bgg_cache_memory_size": config_parser.getint('BoardGameGeek', 'CacheMemorySize', fallback=256),
+            "bgg_cache_max_rows": config_parser.getint('BoardGameGeek', 'CacheMaxRows', fallback=5000),
+            "bgg_import_batch_size": config_parser.getint('BoardGameGeek', 'ImportBatchSize', fallback=20),
+            "catalog_match_threshold": config_parser.getfloat('BoardGameGeek', 'CatalogMatchThreshold', fallback=0.8),
+            "refresh_max_age": config_parser.getfloat('BoardGameGeek', 'RefreshMaxAge', fallback=30),
+            "refresh_batch_size": config_parser.getint('BoardGameGeek', 'RefreshBatchSize', fallback=10),
+            "refresh_interval": config_parser.getfloat('BoardGameGeek', 'RefreshInterval', fallback=10),
+            "refresh_idle_time": config_parser.getfloat('BoardGameGeek', 'RefreshIdleTime', fallback=5),
+            "refresh_requests_per_hour": config_parser.getint('BoardGameGeek', 'RefreshRequestsPerHour', fallback=6)
         }
         return config
 
+    async def close(self):
+        self.message_dispatcher.close()
+        self.deletion_scheduler.close()
+        self.job_scheduler.close()
+        for state in self.channels.values():
+            state.live_board.detach()
+        await self.bgg_client.close()
+        await super().close()
+        self.database.close()
+
     async def on_ready(self):
         print('Logged in as ' + self.user.name)
-        self.bound_channel = self.get_channel(self.config['bound_channels'])
-        print("Bound to: " + self.bound_channel.name)
-
-        poll = self.session.query(GamePoll).first()
-        if poll is not None and poll.active:
-            time_left = (poll.finish_time - datetime.now()).total_seconds()
-            if time_left <= 0:
-                time_left = 0
-
-            end_time = datetime.now() + timedelta(seconds=time_left)
-            print("Voting over at: " + end_time.strftime("%c"))
-            await asyncio.sleep(time_left)
-            await self.finalize_vote()
+        for state in self.channels.values():
+            state.channel = self.get_channel(state.channel_id)
+            if state.channel is None:
+                print("Can't find channel {0}".format(state.channel_id))
+            else:
+                print("Bound to: " + state.channel.name)
+        if self.refreshes_games:
+            self.game_refresher.start()
+        await self.deletion_scheduler.start()
+        # a poll that ran out while the bot was offline is closed right away
+        await self.job_scheduler.start([state.channel_id for state in self.channels.values()
+                                        if state.channel is not None])
+
+        for poll in await self.database.get_active_polls():
+            state = self.channels.get(poll.channel_id)
+            if state is None or state.channel is None:
+                continue
+            state.vote_tally = await self.database.load_vote_tally(state.channel_id)
+            if poll.board_message_id is not None:
+                # votes can't change while the bot is offline, but the board may predate the current format
+                state.live_board.attach(state.channel.get_partial_message(poll.board_message_id))
+                state.live_board.request_update()
+            print("Voting in " + state.channel.name + " over at: " + poll.finish_time.strftime("%c"))
 
     async def on_message(self, message):
-        if message.channel.id != self.config['bound_channels']:
+        state = self.channels.get(message.channel.id)
+        if state is None or state.channel is None:
             return
         if len(message.content) < 1:
             return
@@ -97,120 +184,107 @@ class TabletopBot(discord.Client):
             return
 
         print(str(message.author) + ": " + message.content)
+        self.game_refresher.mark_activity()
         command = message.content[1:].split(" ")
 
         command_title = command[0].lower()
 
         try:
-            await self.available_commands[command_title](message, command)
+            command_function = self.available_commands[command_title]
         except KeyError:
-            await self.send_message_safe(self.bound_channel, "Not a valid command", 0, delete=False)
+            await self.send_message_safe(state.channel, "Not a valid command", 0, delete=False)
+            return
+        async with self.database.unit_of_work():
+            await command_function(state, message, command)
 
     async def on_message_edit(self, before, after):
         if before.content != after.content:
             await self.on_message(after)
 
-    async def ping(self, message, command):
-        await self.send_message_safe(self.bound_channel, 'Pong!', 0, delete=False)
-
-    async def events(self, message, command):
-        all_events = self.session \
-            .query(Event.id, Event.name, Event.date, Event.game_decided, Event.winning_game_id,
-                   func.count(RSVP.id).label("count")) \
-            .outerjoin(RSVP) \
-            .filter(Event.date > datetime.now()) \
-            .group_by(Event.id) \
-            .all()
-        if not all_events:
+    async def ping(self, state, message, command):
+        await self.send_message_safe(state.channel, 'Pong!', 0, delete=False)
+
+    async def events(self, state, message, command):
+        message_to_send = await self.render_cache.get("events", state.channel_id,
+                                                      [("events", state.channel_id), ("games", None)],
+                                                      lambda: self.render_events(state))
+        if message_to_send is None:
             message_to_send = "There are no events planned!"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             return
+        await self.send_message_safe(state.channel, message_to_send, 0, delete=False)
+
+    # the list changes by itself once the next event starts
+    async def render_events(self, state):
+        all_events = await self.database.get_upcoming_events(state.channel_id, datetime.now())
+        if not all_events:
+            return None, None
         message_to_send = "Upcoming Events:"
         for event in all_events:
             event_datetime = event.date.strftime("%c")
             if event.game_decided:
-                winning_game = self.session.query(Game).filter(Game.id == event.winning_game_id).first()
                 message_to_send += "\n{0.id}) {0.name} at {1} with {0.count} attending ".format(event, event_datetime)
-                message_to_send += "playing " + winning_game.title + " | <" + winning_game.url + ">"
+                message_to_send += "playing " + event.winning_title + " | <" + event.winning_url + ">"
             else:
                 message_to_send += "\n{0.id}) {0.name} at {1} with {0.count} attending.".format(event, event_datetime)
-        await self.send_message_safe(self.bound_channel, message_to_send, 0, delete=False)
+        return message_to_send, min(event.date for event in all_events)
 
-    async def suggest(self, message, command):
+    async def suggest(self, state, message, command):
         try:
             bgg_query = command[1]
             bgg_query_long = command[1:]
         except IndexError:
             message_to_send = "The format needs to be !suggest [Suggestion]"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
+            return
+
+        try:
+            game_id = await self.get_game_id(state.channel, bgg_query, bgg_query_long)
+            if game_id is None:
+                return
+            # concurrent suggestions of the same game share one fetch and one insert
+            game_database_entry = await self.single_flight.do("game:" + str(game_id), self.get_or_create_game, game_id)
+        except BGGError as error:
+            print(error)
+            message_to_send = "BoardGameGeek isn't responding, try again later"
+            await self.send_message_safe(state.channel, message_to_send, 30)
             return
 
-        game_id = await self.get_game_id(bgg_query, bgg_query_long)
-        game_database_entry = self.session.query(Game).filter(Game.bgg_id == game_id).first()
         if game_database_entry is None:
-            game_info = self.generate_suggestion(game_id)
-            game_database_entry = Game(
-                bgg_id=game_info["id"],
-                url=game_info["url"],
-                title=game_info["game_title"],
-                playtime=game_info["playtime"],
-                description=game_info["description"],
-                image_url=game_info["image_url"],
-                best_players=game_info["best"],
-                recommended_players=game_info["recommended"]
-            )
-            self.session.add(game_database_entry)
-            self.session.commit()
-        else:
-            game_info = game_database_entry.get_game_info()
-        previous_suggestion = self.session.query(Suggestion.id, Member.name).join(Member).filter(
-            Suggestion.game_id == game_database_entry.id).first()
+            message_to_send = "No game found!"
+            await self.send_message_safe(state.channel, message_to_send, 30)
+            return
+        game_info = game_database_entry.get_game_info()
+        previous_suggestion = await self.database.get_suggestion_author(state.channel_id, game_database_entry.id)
         if previous_suggestion is not None:
             message_to_send = "This game has already been suggested by " + previous_suggestion.name
             print(message_to_send)
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             return
 
-        # make lowest possible vote_number
-        results = self.session.query(Suggestion.vote_number).order_by(Suggestion.vote_number).all()
-        open_vote_number = 1
-        current_vote_numbers = []
-        for result in results:
-            current_vote_numbers.append(result.vote_number)
-
-        while True:
-            if open_vote_number in current_vote_numbers:
-                open_vote_number += 1
-                continue
-            else:
-                break
+        member = await self.get_member(state, message)
+        suggestion = await self.database.add_suggestion(state.channel_id, member.id, game_database_entry.id)
+        if suggestion is None:
+            # someone else suggested it since the check above
+            previous_suggestion = await self.database.get_suggestion_author(state.channel_id, game_database_entry.id)
+            message_to_send = "This game has already been suggested by " + previous_suggestion.name
+            await self.send_message_safe(state.channel, message_to_send, 30)
+            return
+        self.render_cache.invalidate("suggestions", state.channel_id)
+        if state.vote_tally is not None:
+            state.vote_tally.add_suggestion(await self.database.get_suggestion_tally_row(suggestion.id))
 
-        member = self.get_member(message)
+        await self.output_suggestion_game_info(state.channel, game_info)
 
-        self.session.add(Suggestion(
-            author_id=member.id,
-            vote_number=open_vote_number,
-            game_id=game_database_entry.id,
-            number_lost=0
-        ))
-        self.session.commit()
+        # a suggestion made during a poll shows up on the live board
+        state.live_board.request_update()
 
-        await self.output_suggestion_game_info(game_info)
+    async def help(self, state, message, command):
+        message_to_send = await self.render_cache.get("help", None, [], self.render_help)
+        await self.send_message_safe(state.channel, message_to_send, 0, delete=False)
+        return
 
-        poll_active = self.session.query(GamePoll.active).first()
-        if poll_active:
-            suggestions_list = []
-            for suggestion in self.session.query(Suggestion.vote_number, Game.title, Game.url).join(Game).all():
-                message_to_send = str(suggestion.vote_number) + ") " + suggestion.title + " | <" + \
-                                  suggestion.url + ">"
-                suggestions_list.append(message_to_send)
-
-            combined_suggestions = "\n".join(suggestions_list)
-            this_message = await self.send_message_safe(self.bound_channel, combined_suggestions, 0, delete=False)
-            self.session.add(Message(message_id=this_message.id))
-            self.session.commit()
-
-    async def help(self, message, command):
+    async def render_help(self):
         string_list = [
             "---Command List---\n",
             "!help",
@@ -260,173 +334,161 @@ class TabletopBot(discord.Client):
             "Clear all Suggestions\n",
 
             "!clear_messages",
-            "Delete the last 1000 messages in the channel that are not pinned"
-        ]
+            "Delete the last 1000 messages in the channel that are not pinned\n",
 
-        message_to_send = "\n".join(string_list)
-        await self.send_message_safe(self.bound_channel, message_to_send, 0, delete=False)
-        return
+            "!import_games [BGG Username] or !import_games [Game ID] [Game ID]...",
+            "Add a BoardGameGeek collection or a list of game IDs to the game library\n",
 
-    async def rsvp(self, message, command):
+            "!repair_counters",
+            "Recount the attendees of every event\n",
+
+            "!stats",
+            "Display BoardGameGeek cache and game catalog statistics"
+        ]
+        return "\n".join(string_list), None
+
+    async def rsvp(self, state, message, command):
         try:
             event_id = command[1]
         except IndexError:
             message_to_send = "You need to event an Event ID"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             return
 
         # check if it is a real event
-        this_event = self.session.query(Event).filter(Event.id == event_id).first()
+        this_event = await self.database.get_event(state.channel_id, event_id)
         if this_event is None:
             message_to_send = "This is not a valid Event ID"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             return
         # check if already rsvp'd
-        member = self.get_member(message)
-        previous_rsvp = self.session.query(RSVP).filter(RSVP.member_id == member.id, RSVP.event_id == event_id).first()
-        if previous_rsvp is not None:
+        member = await self.get_member(state, message)
+        current_player_count = await self.database.add_rsvp(member.id, event_id)
+        if current_player_count is None:
             message_to_send = "You already RSVP'd, but now you can be sure!"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             return
-        new_rsvp = RSVP(member_id=member.id, event_id=event_id)
-        self.session.add(new_rsvp)
-        self.session.commit()
+        self.render_cache.invalidate("events", state.channel_id)
 
-        current_player_count = len(self.session.query(RSVP).filter(RSVP.event_id == event_id).all())
         if current_player_count == 1:
             count_message = "is currently 1 person"
         else:
             count_message = "are currently {0} people".format(
                 current_player_count)
         message_to_send = "Ok I've got you down! There {0} attending".format(count_message)
-        await self.send_message_safe(self.bound_channel, message_to_send, 0, delete=False)
+        await self.send_message_safe(state.channel, message_to_send, 0, delete=False)
         return
 
-    async def cancel(self, message, command):
+    async def cancel(self, state, message, command):
         try:
             event_id = command[1]
         except IndexError:
             message_to_send = "You need to event an Event ID"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             return
 
         # check if it is a real event
-        this_event = self.session.query(Event).filter(Event.id == event_id).first()
+        this_event = await self.database.get_event(state.channel_id, event_id)
         if this_event is None:
             message_to_send = "This is not a valid Event ID"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             return
 
         # check if rsvp'd
-        member = self.get_member(message)
-        previous_rsvp = self.session.query(RSVP).filter(RSVP.member_id == member.id,
-                                                        RSVP.event_id == event_id).first()
-        if previous_rsvp is None:
+        member = await self.get_member(state, message)
+        current_player_count = await self.database.remove_rsvp(member.id, event_id)
+        if current_player_count is None:
             message_to_send = "You never RSVP'd, so we know your aren't coming!"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             return
+        self.render_cache.invalidate("events", state.channel_id)
 
-        self.session.delete(previous_rsvp)
-        self.session.commit()
-
-        current_player_count = len(self.session.query(RSVP).filter(RSVP.event_id == event_id).all())
         if current_player_count == 1:
             count_message = "1 person"
         else:
             count_message = "{0} people".format(
                 current_player_count)
         message_to_send = "Sorry to hear you have to cancel! There is now {0} attending".format(count_message)
-        await self.send_message_safe(self.bound_channel, message_to_send, 0, delete=False)
+        await self.send_message_safe(state.channel, message_to_send, 0, delete=False)
         return
 
-    async def suggestions(self, message, command):
-        current_suggestions = self.session.query(Game).join(Suggestion).all()
-        if not current_suggestions:
+    async def suggestions(self, state, message, command):
+        embeds = await self.render_cache.get("suggestions", state.channel_id,
+                                             [("suggestions", state.channel_id), ("games", None)],
+                                             lambda: self.render_suggestions(state))
+        if not embeds:
             message_to_send = "There are currently no suggestions!"
-            await self.send_message_safe(self.bound_channel, message_to_send, 60)
+            await self.send_message_safe(state.channel, message_to_send, 60)
             return
-        for suggestion in current_suggestions:
-            await self.output_suggestion_game_info(suggestion.get_game_info())
+        for embed in embeds:
+            await self.send_message(state.channel, content=None, embed=embed)
+
+    async def render_suggestions(self, state):
+        current_suggestions = await self.database.get_suggested_game_infos(state.channel_id)
+        embeds = [await self.get_game_embed(game_info) for game_info in current_suggestions]
+        return embeds, self.get_game_view_expiry()
 
-    async def vote(self, message, command):
-        this_poll = self.session.query(GamePoll).first()
+    async def vote(self, state, message, command):
+        this_poll = await self.database.get_poll(state.channel_id)
         if not this_poll:
             message_to_send = "Voting has not yet begun!"
-            await self.send_message_safe(self.bound_channel, message_to_send, 10)
+            await self.send_message_safe(state.channel, message_to_send, 10)
             return
 
         # check if rsvp
-        this_member = self.get_member(message)
-        this_rsvp = self.session.query(GamePoll).join(Event).join(RSVP).join(Member).filter(
-            Member.id == this_member.id).first()
+        this_member = await self.get_member(state, message)
+        this_rsvp = await self.database.member_can_vote(state.channel_id, this_member.id)
         if not this_rsvp:
             message_to_send = "You can't vote if you didn't RSVP!"
-            await self.send_message_safe(self.bound_channel, message_to_send, 10)
+            await self.send_message_safe(state.channel, message_to_send, 10)
             return
 
         try:
             game_vote = command[1]
         except IndexError:
             message_to_send = "You didn't pick anything!"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             return
 
         if not game_vote.isdigit():
             message_to_send = "You need to vote using a number!"
-            await self.send_message_safe(self.bound_channel, message_to_send, 10)
+            await self.send_message_safe(state.channel, message_to_send, 10)
             return
-        if self.session.query(Suggestion).filter(Suggestion.vote_number == command[1]).first() is None:
+        vote_tally = await self.get_vote_tally(state)
+        suggestion_id = vote_tally.get_suggestion_id(int(game_vote))
+        if suggestion_id is None:
             message_to_send = "Not a valid vote!"
-            await self.send_message_safe(self.bound_channel, message_to_send, 10)
+            await self.send_message_safe(state.channel, message_to_send, 10)
             return
 
-        # check if already voted, delete old vote
-        old_vote = self.session.query(Vote).join(Member).filter(Vote.member_id == this_member.id).first()
-        if old_vote is not None:
-            self.session.delete(old_vote)
-            self.session.commit()
-
-        # add new vote
-        suggestion = self.session.query(Suggestion).filter(Suggestion.vote_number == int(game_vote)).first()
-        new_vote = Vote(member_id=this_member.id, suggestion_id=suggestion.id)
-        self.session.add(new_vote)
-        self.session.commit()
-
-        # get current totals
-        current_vote_totals = self.get_current_vote_totals()
+        # replaces any old vote, the database stays the source of truth and the tally follows it
+        await self.database.set_vote(state.channel_id, this_member.id, suggestion_id)
+        vote_tally.apply_vote(this_member.id, suggestion_id, this_member.power)
 
         # display current totals
-        message_list = []
-        for this_vote_total in current_vote_totals:
-            message_list.append(str(this_vote_total.vote_number) + ") " + this_vote_total.title + " votes: " + str(
-                this_vote_total.vote_quantity))
-        message_to_send = "\n".join(message_list)
-        this_message = await self.send_message_safe(self.bound_channel, message_to_send, 0, delete=False)
-        self.session.add(Message(message_id=this_message.id))
-
-        self.session.commit()
-
-    async def power(self, message, command):
-        member = self.get_member(message)
+        state.live_board.request_update()
+
+    async def power(self, state, message, command):
+        member = await self.get_member(state, message)
         member_power = member.power
         if member_power == 1:
             count_message = "1 vote"
         else:
             count_message = str(member_power) + " votes"
         message_to_send = "Your vote currently counts as " + count_message
-        await self.send_message_safe(self.bound_channel, message_to_send, 60)
+        await self.send_message_safe(state.channel, message_to_send, 60)
         return
 
-    async def start_vote(self, message, command):
+    async def start_vote(self, state, message, command):
         if message.author.id != self.config["owner_id"]:
             message_to_send = "You don't have permission to start_vote"
-            await self.send_message_safe(self.bound_channel, message_to_send, 10)
+            await self.send_message_safe(state.channel, message_to_send, 10)
             return
 
-        poll_active = self.session.query(GamePoll.active).first()
+        poll_active = await self.database.get_poll(state.channel_id)
         if poll_active:
             message_to_send = "Voting has already begun!"
-            await self.send_message_safe(self.bound_channel, message_to_send, 10)
+            await self.send_message_safe(state.channel, message_to_send, 10)
             await self.delete_message(message)
             return
 
@@ -435,91 +497,85 @@ class TabletopBot(discord.Client):
             hours_string = command[2]
         except IndexError:
             message_to_send = "Needs to use the format !start_vote [Event ID] [Hours]"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             return
 
         if hours_string.isdigit() is False:
             message_to_send = "Need a numerical parameter for hours!"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             await self.delete_message(message)
             return
 
-        if self.session.query(Suggestion).first() is None:
+        if not await self.database.has_suggestions(state.channel_id):
             message_to_send = "There are no suggestions!"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             await self.delete_message(message)
             return
 
-        this_event = self.session.query(Event).filter(Event.id == event_id).first()
+        this_event = await self.database.get_event(state.channel_id, event_id)
         if this_event is None:
             message_to_send = "Event with that ID not found!"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             await self.delete_message(message)
             return
 
         if this_event.game_decided:
             message_to_send = "This event has already selected a game!"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             await self.delete_message(message)
             return
 
         voting_duration = int(hours_string)
         voting_over = datetime.now() + timedelta(hours=voting_duration)
 
-        self.session.add(GamePoll(active=True, finish_time=voting_over, event_id=event_id))
+        poll = await self.database.start_poll(state.channel_id, event_id, voting_over)
+        # scheduled before any message is sent, so the poll still closes if sending fails
+        reminder_time = voting_over - timedelta(minutes=5)
+        if reminder_time > datetime.now():
+            await self.job_scheduler.schedule(state.channel_id, "poll_reminder", poll.id, reminder_time)
+        await self.job_scheduler.schedule(state.channel_id, "poll_close", poll.id, voting_over)
+        state.vote_tally = await self.database.load_vote_tally(state.channel_id)
 
-        event_rsvps = self.session \
-            .query(Event.id, func.count(RSVP.id).label("count")) \
-            .outerjoin(RSVP) \
-            .filter(Event.id == event_id) \
-            .group_by(Event.id) \
-            .first()
-        rsvp_count = event_rsvps.count
+        rsvp_count = await self.database.get_rsvp_count(event_id)
 
-        directions_string = self.get_mention_group_string() + "\n" + \
+        directions_string = state.get_mention_group_string() + "\n" + \
             " It's time to vote on games for " + this_event.name + "!" + \
             " Use the !vote command followed by the game's id below (e.g. !vote 1).\n" + \
             " Voting ends at " + voting_over.strftime("%H:%M %Z on %m/%d") + "\n" + \
             " There are currently " + str(rsvp_count) + " attendees, so keep player counts in mind." + \
             " There will be multiple groups if there are enough players to do so." + \
             " RSVP count isn't finalized, as anyone can cancel or join last minute."
-        directions_message = await self.send_message_safe(self.bound_channel, directions_string, 0, delete=False)
-        self.session.add(Message(message_id=directions_message.id))
-
-        suggestions_list = []
-        for suggestion in self.session.query(Suggestion.vote_number, Game.title, Game.url).join(Game).all():
-            message_to_send = str(suggestion.vote_number) + ") " + suggestion.title + " | <" + \
-                              suggestion.url + ">"
-            suggestions_list.append(message_to_send)
-
-        combined_suggestions = "\n".join(suggestions_list)
-        this_message = await self.send_message_safe(self.bound_channel, combined_suggestions, 0, delete=False)
-        self.session.add(Message(message_id=this_message.id))
-        self.session.commit()
-
-        await self.delete_message(message)
-        await asyncio.sleep((voting_duration * 60 * 60) - (5 * 60))
-
-        message_to_send = self.get_mention_group_string() + " 5 minutes left to vote!"
-        this_message = await self.send_message_safe(self.bound_channel, message_to_send, 0, delete=False)
-        self.session.add(Message(message_id=this_message.id))
-        self.session.commit()
+        directions_message = await self.send_message_safe(state.channel, directions_string, 0, delete=False)
+        await self.database.add_message(state.channel_id, directions_message.id)
+
+        # the board is tracked like any other poll message, so it is deleted with them when the poll ends
+        board_string = await self.get_board_string(state)
+        board_message = await self.send_message_safe(state.channel, board_string, 0, delete=False)
+        await self.database.add_message(state.channel_id, board_message.id)
+        await self.database.set_poll_board_message(poll.id, board_message.id)
+        try:
+            await board_message.pin()
+        except discord.errors.HTTPException as error:
+            print("Couldn't pin the live board: {0}".format(error))
+        state.live_board.attach(board_message, board_string)
 
-        await asyncio.sleep(5 * 60)
-        await self.finalize_vote()
+        try:
+            await self.delete_message(message)
+        except discord.errors.HTTPException as error:
+            print("Couldn't delete the start_vote command: {0}".format(error))
 
-    async def end_vote(self, message, command):
+    async def end_vote(self, state, message, command):
         if message.author.id != self.config["owner_id"]:
             message_to_send = "You don't have permission to delete_all"
-            await self.send_message_safe(self.bound_channel, message_to_send, 10)
+            await self.send_message_safe(state.channel, message_to_send, 10)
             return
 
-        await self.finalize_vote()
+        await self.finalize_vote(state)
 
-    async def create_event(self, message, command):
+    async def create_event(self, state, message, command):
         if message.author.id != self.config["owner_id"]:
             message_to_send = "You don't have permission to delete_all"
-            await self.send_message_safe(self.bound_channel, message_to_send, 10)
+            await self.send_message_safe(state.channel, message_to_send, 10)
             return
         try:
             date_string = command[1]
@@ -527,7 +583,7 @@ class TabletopBot(discord.Client):
             name_string = " ".join(command[3:])
         except IndexError:
             message_to_send = "Not the correct format: !create_event YYYY-MM-DD 2359 event_name"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             return
 
         datetime_string = date_string + " " + time_string
@@ -536,17 +592,16 @@ class TabletopBot(discord.Client):
         except ValueError:
             print(datetime_string)
             message_to_send = "Not a valid date and time format (YYYY-MM-DD 2359)"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             return
 
         if event_date_time < datetime.now():
             message_to_send = "Event can't be in the past!"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             return
 
-        new_event = Event(date=event_date_time, name=name_string)
-        self.session.add(new_event)
-        self.session.commit()
+        new_event = await self.database.create_event(state.channel_id, event_date_time, name_string)
+        self.render_cache.invalidate("events", state.channel_id)
 
         event_date_long = new_event.date.strftime("%A %B %d at %I:%M %p")
         event_time_delta = new_event.date - datetime.now()
@@ -563,61 +618,63 @@ class TabletopBot(discord.Client):
             time_till_event_string = " less than an hour"
         else:
             time_till_event_string = days_string + hours_string
-        message_to_send = self.get_mention_group_string() + "\n" + \
+        message_to_send = state.get_mention_group_string() + "\n" + \
             "New Event Created: ({0.id}) {0.name}\n".format(new_event) + \
             "Event Date: {0}\n".format(event_date_long) + \
             "Time till Event: {0}.".format(time_till_event_string)
-        await self.send_message_safe(self.bound_channel, message_to_send, 0, delete=False)
+        await self.send_message_safe(state.channel, message_to_send, 0, delete=False)
+
+        reminder_time = new_event.date - timedelta(hours=self.config["event_reminder_hours"])
+        if self.config["event_reminder_hours"] > 0 and reminder_time > datetime.now():
+            await self.job_scheduler.schedule(state.channel_id, "event_reminder", new_event.id, reminder_time)
         return
 
-    async def cancel_event(self, message, command):
+    async def cancel_event(self, state, message, command):
         if message.author.id != self.config["owner_id"]:
             message_to_send = "You don't have permission to cancel_event"
-            await self.send_message_safe(self.bound_channel, message_to_send, 10)
+            await self.send_message_safe(state.channel, message_to_send, 10)
             return
         try:
             event_id = command[1]
         except IndexError:
             message_to_send = "You need to enter an event id!"
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             return
-        result = self.session.query(Event).filter(Event.id == event_id).first()
-        self.session.delete(result)
-
+        poll = await self.database.get_poll(state.channel_id)
         # delete associated GamePoll, Votes, Messages, and RSVPs
-        game_poll = self.session.query(GamePoll).filter(GamePoll.event_id == event_id).first()
-        if game_poll is not None:
-            self.session.delete(game_poll)
-            votes = self.session.query(Vote).all()
-            for item in votes:
-                self.session.delete(item)
-            await self.delete_saved_messages()
-        event_rsvps = self.session.query(RSVP).filter(RSVP.event_id == event_id).all()
-        if event_rsvps is not None:
-            for item in event_rsvps:
-                self.session.delete(item)
-
-        self.session.commit()
+        had_poll = await self.database.cancel_event(state.channel_id, event_id)
+        if had_poll is None:
+            message_to_send = "This is not a valid Event ID"
+            await self.send_message_safe(state.channel, message_to_send, 30)
+            return
+        self.render_cache.invalidate("events", state.channel_id)
+        await self.job_scheduler.cancel("event_reminder", int(event_id))
+        if had_poll:
+            await self.cancel_poll_jobs(poll)
+            state.vote_tally = None
+            state.live_board.detach()
+            await self.delete_saved_messages(state)
+
         message_to_send = "Done"
-        await self.send_message_safe(self.bound_channel, message_to_send, 10)
+        await self.send_message_safe(state.channel, message_to_send, 10)
         return
 
-    async def clear_suggestions(self, message, command):
+    async def clear_suggestions(self, state, message, command):
         if message.author.id != self.config["owner_id"]:
             message_to_send = "You don't have permission to delete_all"
-            await self.send_message_safe(self.bound_channel, message_to_send, 10)
+            await self.send_message_safe(state.channel, message_to_send, 10)
             return
-        for suggestion in self.session.query(Suggestion).all():
-            self.session.delete(suggestion)
-        self.session.commit()
+        await self.database.clear_suggestions(state.channel_id)
+        self.render_cache.invalidate("suggestions", state.channel_id)
+        state.vote_tally = None
         message_to_send = "Done"
-        await self.send_message_safe(self.bound_channel, message_to_send, 10)
+        await self.send_message_safe(state.channel, message_to_send, 10)
         return
 
-    async def clear_messages(self, message, command):
+    async def clear_messages(self, state, message, command):
         if message.author.id != self.config["owner_id"]:
             message_to_send = "You don't have permission to delete_all"
-            await self.send_message_safe(self.bound_channel, message_to_send, 10)
+            await self.send_message_safe(state.channel, message_to_send, 10)
             return
 
         def is_pinned(m):
@@ -628,29 +685,139 @@ class TabletopBot(discord.Client):
 
         pinned_messages = await message.channel.pins()
         await message.channel.purge(limit=1000, check=is_pinned)
-        for item in self.session.query(Message).all():
-            self.session.delete(item)
-        self.session.commit()
+        await self.database.clear_saved_messages(state.channel_id)
+
+    async def import_games(self, state, message, command):
+        if message.author.id != self.config["owner_id"]:
+            message_to_send = "You don't have permission to import_games"
+            await self.send_message_safe(state.channel, message_to_send, 10)
+            return
+
+        arguments = " ".join(command[1:]).replace(",", " ").split()
+        if not arguments:
+            message_to_send = "Needs to use the format !import_games [BGG Username] or !import_games [Game ID]..."
+            await self.send_message_safe(state.channel, message_to_send, 30)
+            return
+
+        progress_message = await self.send_message_safe(state.channel, "Importing games...", 0, delete=False)
+
+        async def progress(done, total):
+            await progress_message.edit(content="Importing games... {0}/{1}".format(done, total))
+
+        try:
+            if all(argument.isdigit() for argument in arguments):
+                game_ids = arguments
+            else:
+                await progress_message.edit(content="Fetching the collection of " + arguments[0] + "...")
+                game_ids = await self.game_importer.get_collection_ids(arguments[0])
+            results = await self.game_importer.import_games(game_ids, progress)
+        except BGGError as error:
+            print(error)
+            await progress_message.edit(content="Import failed, BoardGameGeek isn't responding")
+            return
+        if results["updated"]:
+            self.render_cache.invalidate("games")
+
+        await progress_message.edit(content="Import finished: {0[added]} added, {0[updated]} updated, "
+                                            "{0[not_found]} not found".format(results))
+
+    async def repair_counters(self, state, message, command):
+        if message.author.id != self.config["owner_id"]:
+            message_to_send = "You don't have permission to repair_counters"
+            await self.send_message_safe(state.channel, message_to_send, 10)
+            return
+
+        repaired = await self.database.repair_rsvp_counts()
+        for channel_id in self.channels:
+            self.render_cache.invalidate("events", channel_id)
+        message_to_send = "Done, {0} event attendee counts were wrong".format(repaired)
+        await self.send_message_safe(state.channel, message_to_send, 30)
 
-    async def finalize_vote(self):
-        current_vote_totals = self.get_current_vote_totals()
+    async def stats(self, state, message, command):
+        if message.author.id != self.config["owner_id"]:
+            message_to_send = "You don't have permission to stats"
+            await self.send_message_safe(state.channel, message_to_send, 10)
+            return
+
+        message_to_send = "\n".join([
+            self.bgg_cache.get_stats_string(),
+            self.game_catalog.get_stats_string(),
+            self.single_flight.get_stats_string(),
+            self.message_dispatcher.get_stats_string(),
+            state.live_board.get_stats_string(),
+            self.render_cache.get_stats_string()
+        ])
+        await self.send_message_safe(state.channel, message_to_send, 60)
+
+    # scheduled jobs, the poll or event may have been ended or cancelled since they were scheduled,
+    # or its channel may no longer be bound
+
+    def get_job_channel_state(self, row):
+        if row is None:
+            return None
+        state = self.channels.get(row.channel_id)
+        if state is None or state.channel is None:
+            return None
+        return state
+
+    async def remind_poll(self, poll_id):
+        poll = await self.database.get_poll_by_id(poll_id)
+        state = self.get_job_channel_state(poll)
+        if state is None or not poll.active:
+            return
+        message_to_send = state.get_mention_group_string() + " 5 minutes left to vote!"
+        this_message = await self.send_message_safe(state.channel, message_to_send, 0, delete=False)
+        await self.database.add_message(state.channel_id, this_message.id)
+
+    async def close_poll(self, poll_id):
+        poll = await self.database.get_poll_by_id(poll_id)
+        state = self.get_job_channel_state(poll)
+        if state is None or not poll.active:
+            return
+        await self.finalize_vote(state)
+
+    async def remind_event(self, event_id):
+        event = await self.database.get_event_by_id(event_id)
+        state = self.get_job_channel_state(event)
+        if state is None or event.date < datetime.now():
+            return
+        attendees_string = "1 attendee" if event.rsvp_count == 1 else str(event.rsvp_count) + " attendees"
+        message_to_send = state.get_mention_group_string() + "\n" + \
+            "Reminder: ({0.id}) {0.name} is {1}\n".format(event, event.date.strftime("%A %B %d at %I:%M %p")) + \
+            "There are currently " + attendees_string + ", use !rsvp " + str(event.id) + " to join."
+        await self.send_message_safe(state.channel, message_to_send, 0, delete=False)
+
+    # poll ids are reused once a poll is gone, so its jobs have to go with it
+    async def cancel_poll_jobs(self, poll):
+        await self.job_scheduler.cancel("poll_reminder", poll.id)
+        await self.job_scheduler.cancel("poll_close", poll.id)
+
+    async def finalize_vote(self, state):
+        poll = await self.database.get_poll(state.channel_id)
+        current_vote_totals = await self.get_final_vote_totals(state)
+        state.vote_tally = None
+        state.live_board.detach()
         if current_vote_totals is None:
             print("No vote totals")
-            game_poll = self.session.query(GamePoll).first()
-            if game_poll is None or game_poll.active is False:
+            if not await self.database.end_poll_without_winner(state.channel_id):
                 return
-            self.session.delete(game_poll)
-            for vote in self.session.query(Vote).all():
-                self.session.delete(vote)
+            await self.cancel_poll_jobs(poll)
             # delete all messages related to this poll
-            await self.delete_saved_messages()
+            await self.delete_saved_messages(state)
             message_to_send = "Voting ended with no winner."
-            await self.send_message_safe(self.bound_channel, message_to_send, 30)
+            await self.send_message_safe(state.channel, message_to_send, 30)
             return
         winner = current_vote_totals[0]
+        # only whoever closed the poll in the database announces the winner
+        if not await self.database.finalize_poll(state.channel_id, winner.id):
+            return
+        await self.cancel_poll_jobs(poll)
+        # the event now shows the winner, and suggestions that lost too often are gone
+        self.render_cache.invalidate("events", state.channel_id)
+        self.render_cache.invalidate("suggestions", state.channel_id)
 
         # announce winner
-        message_to_send = self.get_mention_group_string() + " " + winner.title + " won with " + \
+        message_to_send = state.get_mention_group_string() + " " + winner.title + " won with " + \
             str(winner.vote_quantity)
         if winner.vote_quantity == 1:
             message_to_send += " vote!"
@@ -659,84 +826,60 @@ class TabletopBot(discord.Client):
 
         message_to_send += " | <" + winner.url + ">"
 
-        await self.send_message_safe(self.bound_channel, message_to_send, 0, delete=False)
+        await self.send_message_safe(state.channel, message_to_send, 0, delete=False)
 
         # delete all messages related to this poll
-        await self.delete_saved_messages()
-
-        # if your vote lost, increase vote power
-        losing_voters = self.session.query(Member).join(Vote).filter(
-            Vote.suggestion_id != winner.id).all()
-        for voter in losing_voters:
-            voter.power += 1
-
-        # if suggestion won, reset vote power
-        winning_voters = self.session.query(Member).join(Vote).filter(
-            Vote.suggestion_id == winner.id).all()
-        for item in winning_voters:
-            item.power = 1
-
-        # delete all votes
-        for vote in self.session.query(Vote).all():
-            self.session.delete(vote)
-        self.session.commit()
-
-        # delete suggestion if it has lost 5 or more times in a row
-        for losing_suggestion in current_vote_totals[1:]:
-            this_suggestion = self.session.query(Suggestion).filter(Suggestion.id == losing_suggestion.id).first()
-            new_number_lost = this_suggestion.number_lost + 1
-            if new_number_lost >= 5:
-                self.session.delete(this_suggestion)
-            else:
-                this_suggestion.number_lost = new_number_lost
-        self.session.commit()
-
-        # update number_lost on winning suggestion
-        winning_suggestion = self.session.query(Suggestion).filter(Suggestion.id == current_vote_totals[0].id).first()
-        winning_suggestion.number_lost = 0
-        self.session.commit()
-
-        game_poll = self.session.query(GamePoll).first()
-        if game_poll is None or game_poll.active is False:
-            return
+        await self.delete_saved_messages(state)
+
+    # every suggestion with its current votes, in the order they're winning
+    # links are left to !suggestions, and the board stops at the suggestions that fit in one message
+    async def get_board_string(self, state):
+        vote_tally = await self.get_vote_tally(state)
+        vote_totals = vote_tally.get_totals()
+        board_list = []
+        board_length = 0
+        for index, this_vote_total in enumerate(vote_totals):
+            line = str(this_vote_total.vote_number) + ") " + this_vote_total.title + " | votes: " + \
+                str(this_vote_total.vote_quantity)
+            # leaves room for the line counting the rest
+            if board_length + len(line) > MAX_MESSAGE_LENGTH - 32:
+                board_list.append("...and {0} more".format(len(vote_totals) - index))
+                break
+            board_list.append(line)
+            board_length += len(line) + 1
+        return "\n".join(board_list)
+
+    async def get_vote_tally(self, state):
+        if state.vote_tally is None:
+            state.vote_tally = await self.database.load_vote_tally(state.channel_id)
+        return state.vote_tally
+
+    # the winner comes from the running tally, checked once against the full SQL aggregate
+    async def get_final_vote_totals(self, state):
+        vote_tally = await self.get_vote_tally(state)
+        database_totals = await self.database.get_current_vote_totals(state.channel_id)
+        mismatches = vote_tally.find_mismatches(database_totals)
+        if mismatches:
+            print("Vote tally disagrees with the database, using the database totals: " + "; ".join(mismatches))
+            return database_totals
+        if not vote_tally.has_votes():
+            return None
+        return vote_tally.get_totals()
 
-        # Update the event: The game has been decided
-        this_event = self.session.query(Event).filter(Event.id == game_poll.event_id).first()
-        if this_event is None:
-            print("Missing event in finalize_vote")
-        this_event.game_decided = True
-        this_event.winning_game_id = winning_suggestion.game_id
+    # gets member or creates one if they don't exist
+    async def get_member(self, state, message):
+        return await self.database.get_member(state.channel_id, message.author.id, str(message.author))
 
-        self.session.delete(game_poll)
-        self.session.commit()
+    async def output_suggestion_game_info(self, channel, game_info):
+        embed = await self.get_game_embed(game_info)
+        await self.send_message(channel, content=None, embed=embed)
 
-    def get_current_vote_totals(self):
-        if self.session.query(Vote).first() is None:
-            return None
-        result = self.session.query(
-            Suggestion.id,
-            Suggestion.vote_number,
-            Game.bgg_id.label("game_id"),
-            Game.title,
-            Game.url,
-            func.sum(Member.power).label('vote_quantity')) \
-            .join(Game) \
-            .outerjoin(Vote).outerjoin(Member) \
-            .group_by(Suggestion.id) \
-            .order_by(desc('vote_quantity')) \
-            .all()
-        return result
+    async def get_game_embed(self, game_info):
+        # a game that was just added still has the id it was parsed with, a string
+        return await self.render_cache.get("game", int(game_info["id"]), [("games", None)],
+                                           lambda: self.render_game_embed(game_info))
 
-    # gets member or creates one if they don't exist
-    def get_member(self, message):
-        member = self.session.query(Member).filter(Member.name == str(message.author)).first()
-        if member is None:
-            member = Member(discord_id=message.author.id, name=str(message.author), power=1)
-            self.session.add(member)
-            self.session.commit()
-        return member
-
-    async def output_suggestion_game_info(self, game_info):
+    async def render_game_embed(self, game_info):
         if len(game_info["description"]) > 2044:
             output_description = game_info["description"][0:2043] + "..."
         else:
@@ -748,104 +891,55 @@ class TabletopBot(discord.Client):
         embed.add_field(name="Recommended", value=game_info["recommended"])
         embed.add_field(name="Best with", value=game_info["best"] + " players")
         embed.set_footer(text=output_description)
+        return embed, self.get_game_view_expiry()
 
-        await self.send_message(self.bound_channel, content=None, embed=embed)
-
-    @staticmethod
-    def generate_suggestion(game_id):
-        url_xml = "https://boardgamegeek.com/xmlapi/boardgame/" + game_id
-        page = requests.get(url_xml)
-        soup = BeautifulSoup(page.content, 'xml')
-        # print(soup.prettify())
-
-        description = html.unescape(soup.find("description").text).replace("<br/>", "\n")
-        image_url = soup.find("image").text
-
-        suggested_players_poll = soup.find("poll", {"name": "suggested_numplayers"})
-        results = suggested_players_poll.find_all("results")
-        result_dictionary = {}
-        for result in results:
-            result_dictionary[result.attrs["numplayers"]] = {
-                "Best": int(result.find("result", {"value": "Best"}).attrs["numvotes"]),
-                "Recommended": int(result.find("result", {"value": "Recommended"}).attrs["numvotes"]),
-                "Not Recommended": int(result.find("result", {"value": "Not Recommended"}).attrs["numvotes"]),
-            }
-
-        result_conclusions = {
-            "Best": {
-                "number of players": 0,
-                "votes": 0
-            },
-            "Recommended": {
-                "min-title": "N/A",
-                "min-value": 1000,
-                "max-title": "N/A",
-                "max-value": -1
-            }
-        }
-        for number_of_players, suggestions in result_dictionary.items():
-            # best first
-            if suggestions["Best"] > result_conclusions["Best"]["votes"]:
-                result_conclusions["Best"] = {
-                    "number of players": number_of_players,
-                    "votes": suggestions["Best"]
-                }
-            if suggestions["Best"] + suggestions["Recommended"] > suggestions["Not Recommended"]:
-                if number_of_players.find("+") != -1:
-                    result_conclusions["Recommended"]["max-title"] = number_of_players
-                    result_conclusions["Recommended"]["max-value"] = int(number_of_players[:-1]) + 1
-                else:
-                    int_players = int(number_of_players)
-                    if int_players > result_conclusions["Recommended"]["max-value"]:
-                        result_conclusions["Recommended"]["max-value"] = int_players
-                        result_conclusions["Recommended"]["max-title"] = number_of_players
-                    if int_players < result_conclusions["Recommended"]["min-value"]:
-                        result_conclusions["Recommended"]["min-value"] = int_players
-                        result_conclusions["Recommended"]["min-title"] = number_of_players
-
-        recommended_string = str(result_conclusions["Recommended"]["min-title"]) + "-" + str(
-            result_conclusions["Recommended"]["max-title"]) + " Players"
-
-        min_playtime = soup.find("minplaytime").text
-        max_playtime = soup.find("maxplaytime").text
-        if min_playtime == max_playtime:
-            playtime = min_playtime + " minutes"
-        else:
-            playtime = min_playtime + "-" + max_playtime + " minutes"
-
-        game_info = {
-            "id": game_id,
-            "url": "https://www.boardgamegeek.com/boardgame/" + game_id,
-            "game_title": soup.find("name", {"primary": "true"}).text,
-            "playtime": playtime,
-            "description": description,
-            "image_url": image_url,
-            "best": result_conclusions["Best"]["number of players"],
-            "recommended": recommended_string
-        }
+    # games are refreshed by the worker running shard 0, the other workers can't see when that happens,
+    # so their game views are rendered again every refresh interval instead
+    def get_game_view_expiry(self):
+        if self.refreshes_games:
+            return None
+        return datetime.now() + timedelta(minutes=self.config["refresh_interval"])
 
-        return game_info
+    async def get_or_create_game(self, game_id):
+        game_database_entry = await self.database.get_game_by_bgg_id(game_id)
+        if game_database_entry is not None:
+            return game_database_entry
 
+        game_info = await self.generate_suggestion(game_id)
+        if game_info is None:
+            return None
+        game_database_entry = await self.database.add_game(game_info)
+        await self.game_catalog.add(game_database_entry.bgg_id, game_database_entry.title,
+                                    game_info["alternate_names"])
+        return game_database_entry
+
+    async def generate_suggestion(self, game_id):
+        page_content = await self.bgg_cache.get("boardgame", str(game_id))
+        if page_content is None:
+            page_content = (await self.bgg_client.fetch_game(game_id)).decode("utf-8")
+            await self.bgg_cache.set("boardgame", str(game_id), page_content)
+        return parse_boardgame(page_content, str(game_id))
+
+    # replies that get deleted are sent behind announcements, and may be merged with other replies
+    # if the channel is backed up, the deletion is left to the scheduler so the handler can finish
     async def send_message_safe(self, channel, output_string, timeout, delete=True):
-        response_message = await self.send_message(channel, output_string)
         if delete:
-            await asyncio.sleep(timeout)
-            try:
-                await self.delete_message(response_message)
-            except discord.errors.NotFound:
-                print("message already deleted")
+            response_message, timeout = await self.message_dispatcher.send_ephemeral(channel, output_string, timeout)
+            # merged into another reply, which already scheduled the deletion
+            if timeout is not None:
+                await self.deletion_scheduler.schedule(channel, response_message, timeout)
             return
         else:
-            return response_message
+            return await self.send_message(channel, output_string)
 
     async def send_message(self, channel, content=None, **kwargs):
-        return await channel.send(content=content, **kwargs)
+        return await self.message_dispatcher.send(channel, content, **kwargs)
 
     @staticmethod
     async def delete_message(message):
         await message.delete()
 
-    async def get_game_id(self, bgg_query, bgg_query_long):
+    async def get_game_id(self, channel, bgg_query, bgg_query_long):
         regex_url = re.search(r'^https://(?:www\.)?boardgamegeek\.com/boardgame/([\d]+)[\w\d-]*', bgg_query)
         if regex_url:
             game_id = regex_url.group(1)
@@ -854,48 +948,30 @@ class TabletopBot(discord.Client):
             if regex_game_id:
                 game_id = bgg_query
             else:
-                search_string = ""
-                for part in bgg_query_long:
-                    if search_string != "":
-                        search_string += "%20"
-                    search_string += part
-                url_xml = "https://www.boardgamegeek.com/xmlapi/search?search=" + search_string
-                page = requests.get(url_xml)
-                soup = BeautifulSoup(page.content, 'xml')
-                this_game = soup.boardgame
-                if this_game is None:
+                search_string = " ".join(bgg_query_long)
+                game_id = await self.single_flight.do("search:" + search_string.lower(), self.search_game_id,
+                                                      search_string)
+                if game_id is None:
                     message_to_send = "No game found!"
                     print(message_to_send)
-                    await self.send_message_safe(self.bound_channel, message_to_send, 30)
+                    await self.send_message_safe(channel, message_to_send, 30)
                     return
-                game_id = this_game.attrs["objectid"]
         return game_id
 
-    async def delete_saved_messages(self):
-        message_objects_to_delete = self.session.query(Message).all()
-        messages_to_delete = []
-        for item in message_objects_to_delete:
-            try:
-                this_message = await self.get_message(self.bound_channel, item.message_id)
-            except discord.errors.NotFound:
-                continue
-            messages_to_delete.append(this_message)
-            self.session.delete(item)
-
-        number_messages_to_delete = len(messages_to_delete)
-        if number_messages_to_delete >= 1:
-            await self.delete_messages(messages_to_delete)
-        # elif number_messages_to_delete == 1:
-        #     await self.delete_message(self.messages_to_delete_after_vote[0])
+    async def search_game_id(self, search_string):
+        game_id = await self.game_catalog.search(search_string)
+        if game_id is None:
+            game_id = await self.bgg_cache.get("search", search_string.lower())
+        if game_id is None:
+            page_content = await self.bgg_client.search(search_string)
+            game_id = parse_search(page_content)
+            if game_id is not None:
+                await self.bgg_cache.set("search", search_string.lower(), game_id)
+        return game_id
 
-    @staticmethod
-    async def get_message(channel, id):
-        return await channel.fetch_message(id)
-
-    async def delete_messages(self, messages):
-        await self.bound_channel.delete_messages(messages)
-         
-    
-    def get_mention_group_string(self):
-        mention_string = "<@&" + self.config['mention_group_id'] + ">"
-        return mention_string
+    # a row is only removed once Discord has confirmed its message is gone, the rest are retried next time
+    async def delete_saved_messages(self, state):
+        saved_messages = await self.database.get_saved_messages(state.channel_id)
+        row_ids = {item.message_id: item.id for item in saved_messages}
+        deleted_message_ids = await delete_messages_by_id(state.channel, list(row_ids))
+        await self.database.delete_saved_messages([row_ids[message_id] for message_id in deleted_message_ids])
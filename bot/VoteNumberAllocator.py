@@ -0,0 +1,38 @@
+import heapq
+
+
+# hands out the lowest vote number not in use, gaps left by deleted suggestions are kept in a min-heap
+class VoteNumberAllocator:
+    def __init__(self):
+        self._free_numbers = None
+        self._next_number = 1
+
+    def is_loaded(self):
+        return self._free_numbers is not None
+
+    def load(self, vote_numbers):
+        self._free_numbers = []
+        self._next_number = 1
+        for vote_number in sorted(vote_numbers):
+            self._free_numbers.extend(range(self._next_number, vote_number))
+            self._next_number = vote_number + 1
+        heapq.heapify(self._free_numbers)
+
+    # forgets everything, the next allocation reloads from the database
+    def reset(self):
+        self._free_numbers = None
+
+    def allocate(self):
+        if self._free_numbers:
+            return heapq.heappop(self._free_numbers)
+        vote_number = self._next_number
+        self._next_number += 1
+        return vote_number
+
+    def release(self, vote_number):
+        if self._free_numbers is None:
+            return
+        if vote_number == self._next_number - 1:
+            self._next_number -= 1
+        else:
+            heapq.heappush(self._free_numbers, vote_number)
@@ -0,0 +1,69 @@
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+# same columns as DataAccess.get_current_vote_totals, so either can be handed to finalize_poll
+TallyRow = namedtuple("TallyRow", ["id", "vote_number", "game_id", "title", "url", "vote_quantity"])
+
+
+class VoteTally:
+    def __init__(self, suggestions, votes):
+        # suggestions are rows of (id, vote_number, game_id, title, url), votes are (member_id, suggestion_id, power)
+        self.suggestions = {}
+        self.vote_numbers = {}
+        self.totals = {}
+        self.votes = {}
+        # kept sorted by (-total, suggestion id), so the winner is always leaderboard[0]
+        self.leaderboard = []
+
+        for suggestion in suggestions:
+            self.add_suggestion(suggestion)
+        for vote in votes:
+            self.apply_vote(vote.member_id, vote.suggestion_id, vote.power)
+
+    def add_suggestion(self, suggestion):
+        self.suggestions[suggestion.id] = suggestion
+        self.vote_numbers[suggestion.vote_number] = suggestion.id
+        self.totals[suggestion.id] = 0
+        insort(self.leaderboard, (0, suggestion.id))
+
+    def get_suggestion_id(self, vote_number):
+        return self.vote_numbers.get(vote_number)
+
+    def _move(self, suggestion_id, delta):
+        old_key = (-self.totals[suggestion_id], suggestion_id)
+        del self.leaderboard[bisect_left(self.leaderboard, old_key)]
+        self.totals[suggestion_id] += delta
+        insort(self.leaderboard, (-self.totals[suggestion_id], suggestion_id))
+
+    # a re-vote takes the member's weight off their old suggestion before adding it to the new one
+    def apply_vote(self, member_id, suggestion_id, weight):
+        old_vote = self.votes.get(member_id)
+        if old_vote is not None:
+            old_suggestion_id, old_weight = old_vote
+            if old_suggestion_id in self.totals:
+                self._move(old_suggestion_id, -old_weight)
+        self.votes[member_id] = (suggestion_id, weight)
+        self._move(suggestion_id, weight)
+
+    def has_votes(self):
+        return len(self.votes) > 0
+
+    def get_totals(self):
+        totals = []
+        for negative_total, suggestion_id in self.leaderboard:
+            suggestion = self.suggestions[suggestion_id]
+            totals.append(TallyRow(suggestion.id, suggestion.vote_number, suggestion.game_id, suggestion.title,
+                                   suggestion.url, -negative_total))
+        return totals
+
+    # compares the running totals with the SQL aggregate, returns a list of mismatch descriptions
+    def find_mismatches(self, current_vote_totals):
+        mismatches = []
+        sql_totals = {row.id: row.vote_quantity or 0 for row in current_vote_totals or []}
+        for suggestion_id in set(sql_totals) | set(self.totals):
+            tally_total = self.totals.get(suggestion_id, 0)
+            sql_total = sql_totals.get(suggestion_id, 0)
+            if tally_total != sql_total:
+                mismatches.append("suggestion {0}: tally {1}, database {2}".format(
+                    suggestion_id, tally_total, sql_total))
+        return mismatches
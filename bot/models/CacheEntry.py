@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, UniqueConstraint
+
+from bot.Base import Base
+
+
+class CacheEntry(Base):
+    __tablename__ = 'bgg_cache'
+    __table_args__ = (UniqueConstraint('namespace', 'key'),)
+
+    id = Column(Integer(), primary_key=True)
+    namespace = Column(String(16), nullable=False)
+    key = Column(String(256), nullable=False)
+    value = Column(Text(), nullable=False)
+    expires_at = Column(DateTime(), nullable=False)
+    accessed_at = Column(DateTime(), nullable=False, index=True)
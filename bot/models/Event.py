@@ -1,18 +1,19 @@
-from sqlalchemy import Column, Integer, DateTime, String, ForeignKey, Boolean
+from sqlalchemy import BigInteger, Column, Integer, DateTime, String, ForeignKey, Boolean
 from sqlalchemy.orm import relationship, backref
 
-from bot.Base import Base, Session
-
-session = Session()
+from bot.Base import Base
 
 
 class Event(Base):
     __tablename__ = 'events'
 
     id = Column(Integer(), primary_key=True)
+    channel_id = Column(BigInteger(), index=True)
     date = Column(DateTime())
     name = Column(String(64))
     game_decided = Column(Boolean(), default=0)
     winning_game_id = Column(Integer(), ForeignKey('games.id'), default=1)
+    # kept up to date by every RSVP insert and delete, !repair_counters recounts it
+    rsvp_count = Column(Integer(), default=0)
 
     winning_game = relationship("Game", uselist=False, backref=backref('events'))
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String
+from datetime import datetime
 
-from bot.Base import Base, Session
+from sqlalchemy import Column, Integer, String, DateTime
 
-session = Session()
+from bot.Base import Base
 
 
 class Game(Base):
@@ -17,6 +17,7 @@ class Game(Base):
     image_url = Column(String(256))
     best_players = Column(String(16))
     recommended_players = Column(String(16))
+    fetched_at = Column(DateTime(), index=True)
 
     def get_game_info(self):
         output_dictionary = {
@@ -30,3 +31,14 @@ class Game(Base):
             "recommended": self.recommended_players
         }
         return output_dictionary
+
+    def set_game_info(self, game_info):
+        self.bgg_id = game_info["id"]
+        self.url = game_info["url"]
+        self.title = game_info["game_title"]
+        self.playtime = game_info["playtime"]
+        self.description = game_info["description"]
+        self.image_url = game_info["image_url"]
+        self.best_players = game_info["best"]
+        self.recommended_players = game_info["recommended"]
+        self.fetched_at = datetime.now()
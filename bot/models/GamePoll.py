@@ -1,17 +1,19 @@
-from sqlalchemy import Column, Integer, Boolean, DateTime, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, Boolean, DateTime, ForeignKey
 from sqlalchemy.orm import relationship, backref
 
-from bot.Base import Base, Session
-
-session = Session()
+from bot.Base import Base
 
 
 class GamePoll(Base):
     __tablename__ = 'game_polls'
 
     id = Column(Integer(), primary_key=True)
+    # one poll at a time per channel
+    channel_id = Column(BigInteger(), index=True, unique=True)
     event_id = Column(Integer(), ForeignKey('events.id'), index=True)
     active = Column(Boolean())
     finish_time = Column(DateTime())
+    # the pinned live board showing the poll's standings
+    board_message_id = Column(BigInteger())
 
     event = relationship("Event", uselist=False, backref=backref('game_polls'))
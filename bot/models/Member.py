@@ -1,14 +1,14 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import BigInteger, Column, Integer, String, Index
 
-from bot.Base import Base, Session
-
-session = Session()
+from bot.Base import Base
 
 
 class Member(Base):
     __tablename__ = 'members'
+    __table_args__ = (Index('ix_members_channel_id_discord_id', 'channel_id', 'discord_id', unique=True),)
 
     id = Column(Integer(), primary_key=True)
-    discord_id = Column(Integer(), index=True)  # This could be primary key, maybe in a future build
+    channel_id = Column(BigInteger())
+    discord_id = Column(BigInteger(), index=True)
     name = Column(String(64), index=True)
     power = Column(Integer())
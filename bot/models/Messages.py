@@ -1,12 +1,11 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, ForeignKey
 
-from bot.Base import Base, Session
-
-session = Session()
+from bot.Base import Base
 
 
 class Message(Base):
     __tablename__ = 'messages'
 
     id = Column(Integer(), primary_key=True)
-    message_id = Column(Integer())
+    channel_id = Column(BigInteger(), index=True)
+    message_id = Column(BigInteger())
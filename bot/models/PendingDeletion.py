@@ -0,0 +1,12 @@
+from sqlalchemy import BigInteger, Column, Integer, DateTime
+
+from bot.Base import Base
+
+
+class PendingDeletion(Base):
+    __tablename__ = 'pending_deletions'
+
+    id = Column(Integer(), primary_key=True)
+    channel_id = Column(BigInteger(), nullable=False)
+    message_id = Column(BigInteger(), nullable=False)
+    delete_at = Column(DateTime(), nullable=False, index=True)
@@ -1,13 +1,12 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship, backref
 
-from bot.Base import Base, Session
-
-session = Session()
+from bot.Base import Base
 
 
 class RSVP(Base):
     __tablename__ = 'rsvps'
+    __table_args__ = (Index('ix_rsvps_event_id_member_id', 'event_id', 'member_id', unique=True),)
 
     id = Column(Integer(), primary_key=True)
     event_id = Column(Integer(), ForeignKey('events.id'), index=True)
@@ -0,0 +1,16 @@
+from sqlalchemy import BigInteger, Column, Integer, DateTime, String, Index
+
+from bot.Base import Base
+
+
+class ScheduledJob(Base):
+    __tablename__ = 'scheduled_jobs'
+    # a job is identified by what it does and to which poll or event, scheduling it again moves it
+    __table_args__ = (Index('ix_scheduled_jobs_kind_target_id', 'kind', 'target_id', unique=True),)
+
+    id = Column(Integer(), primary_key=True)
+    # the channel the job's poll or event belongs to, only the worker serving it runs the job
+    channel_id = Column(BigInteger(), index=True)
+    kind = Column(String(32), nullable=False)
+    target_id = Column(Integer(), nullable=False)
+    run_at = Column(DateTime(), nullable=False, index=True)
@@ -1,17 +1,19 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship, backref
 
-from bot.Base import Base, Session
-
-session = Session()
+from bot.Base import Base
 
 
 class Suggestion(Base):
     __tablename__ = 'suggestions'
+    # each channel suggests a game once and numbers its suggestions from 1
+    __table_args__ = (Index('ix_suggestions_channel_id_game_id', 'channel_id', 'game_id', unique=True),
+                      Index('ix_suggestions_channel_id_vote_number', 'channel_id', 'vote_number', unique=True))
 
     id = Column(Integer(), primary_key=True)
+    channel_id = Column(BigInteger())
     author_id = Column(Integer(), ForeignKey('members.id'), index=True)
-    vote_number = Column(Integer(), unique=True)
+    vote_number = Column(Integer())
     game_id = Column(Integer(), ForeignKey('games.id'), index=True)
     number_lost = Column(Integer())
 
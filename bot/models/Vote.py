@@ -1,15 +1,16 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship, backref
 
-from bot.Base import Base, Session
-
-session = Session()
+from bot.Base import Base
 
 
 class Vote(Base):
     __tablename__ = 'votes'
+    # one vote per member in each channel's poll
+    __table_args__ = (Index('ix_votes_channel_id_member_id', 'channel_id', 'member_id', unique=True),)
 
     id = Column(Integer(), primary_key=True)
+    channel_id = Column(BigInteger())
     member_id = Column(Integer(), ForeignKey('members.id'), index=True)
     suggestion_id = Column(Integer(), ForeignKey('suggestions.id'), index=True)
 
@@ -0,0 +1,43 @@
+import argparse
+import asyncio
+
+from bot.BGGClient import BGGClient
+from bot.DataAccess import DataAccess
+from bot.GameCatalog import GameCatalog
+from bot.GameImporter import GameImporter
+from bot.TabletopBot import TabletopBot
+from bot.Base import create_database_engine
+from bot.Migrations import migrate
+
+
+async def import_games(arguments, config):
+    bgg_client = BGGClient.from_config(config)
+    database = DataAccess()
+    game_importer = GameImporter(bgg_client, database, GameCatalog(database),
+                                 batch_size=config["bgg_import_batch_size"])
+
+    async def progress(done, total):
+        print("Fetched {0}/{1}".format(done, total))
+
+    try:
+        game_ids = list(arguments.game_ids)
+        if arguments.collection is not None:
+            game_ids += await game_importer.get_collection_ids(arguments.collection)
+        results = await game_importer.import_games(game_ids, progress)
+    finally:
+        await bgg_client.close()
+        database.close()
+    print("Import finished: {0[added]} added, {0[updated]} updated, {0[not_found]} not found".format(results))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Add BoardGameGeek games to the bot's game library")
+    parser.add_argument("game_ids", nargs="*", help="BoardGameGeek game IDs")
+    parser.add_argument("--collection", help="import every game owned by this BoardGameGeek user")
+    parsed_arguments = parser.parse_args()
+    if not parsed_arguments.game_ids and parsed_arguments.collection is None:
+        parser.error("give some game IDs or a --collection")
+
+    config = TabletopBot.open_config(TabletopBot.config_file)
+    migrate(create_database_engine(config))
+    asyncio.get_event_loop().run_until_complete(import_games(parsed_arguments, config))
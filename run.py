@@ -1,11 +1,37 @@
+from multiprocessing import Process
+
+from bot.Base import create_database_engine
 from bot.TabletopBot import TabletopBot
-from bot.Base import Base, engine
+from bot.Migrations import migrate, assign_default_channel
 
 
-if __name__ == '__main__':
+# shards are dealt out in turn, so worker w runs shards w, w + worker_count, ...
+def get_worker_shard_ids(shard_count, worker_count):
+    return [list(range(worker, shard_count, worker_count)) for worker in range(worker_count)]
 
-    bot = TabletopBot()
-    Base.metadata.create_all(engine)
+
+def run_worker(shard_ids, shard_count):
+    bot = TabletopBot(shard_ids=shard_ids, shard_count=shard_count)
     bot.run()
 
-    # TODO Unit Tests
+
+if __name__ == '__main__':
+
+    config = TabletopBot.open_config(TabletopBot.config_file)
+    # migrations run once, before any worker opens the database
+    engine = create_database_engine(config)
+    migrate(engine)
+    assign_default_channel(engine, config["bound_channels"][0])
+    engine.dispose()
+
+    worker_count = max(config["worker_processes"], 1)
+    if worker_count == 1:
+        run_worker(None, config["shard_count"] or None)
+    else:
+        shard_count = max(config["shard_count"], worker_count)
+        workers = [Process(target=run_worker, args=(shard_ids, shard_count))
+                   for shard_ids in get_worker_shard_ids(shard_count, worker_count)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
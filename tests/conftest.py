@@ -0,0 +1,117 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+from bot.Base import create_database_engine
+from bot.DataAccess import DataAccess
+from bot.MessageDispatcher import MessageDispatcher
+from bot.Migrations import migrate
+from bot.RenderCache import RenderCache
+from bot.TabletopBot import TabletopBot
+
+CHANNEL_ID = 500
+OWNER_ID = 1
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def make_config(url):
+    return {
+        "database_url": url,
+        "database_pool_size": 5,
+        "database_max_overflow": 10,
+        "sqlite_journal_mode": "WAL",
+        "sqlite_synchronous": "NORMAL",
+        "sqlite_cache_size": 16384,
+        "sqlite_mmap_size": 64,
+        "sqlite_busy_timeout": 5000
+    }
+
+
+def make_game_info(game_id):
+    return {
+        "id": game_id,
+        "url": "https://boardgamegeek.com/boardgame/{0}".format(game_id),
+        "game_title": "Game {0}".format(game_id),
+        "playtime": "60 minutes",
+        "description": "A game",
+        "image_url": "https://example.com/{0}.png".format(game_id),
+        "best": "4",
+        "recommended": "3-4"
+    }
+
+
+class Message:
+    def __init__(self, channel, message_id, content, author=None):
+        self.channel = channel
+        self.id = message_id
+        self.content = content
+        self.author = author
+        self.pinned = False
+
+    async def pin(self):
+        self.pinned = True
+
+    async def edit(self, content):
+        self.content = content
+
+    async def delete(self):
+        self.channel.deleted.append(self.id)
+
+
+# message ids are snowflakes made now, so they can be bulk deleted
+def make_message_id(number):
+    return ((int(time.time() * 1000) - discord.utils.DISCORD_EPOCH) << 22) + number
+
+
+class Channel:
+    def __init__(self, channel_id=CHANNEL_ID):
+        self.id = channel_id
+        self.sent = []
+        self.deleted = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append(content if content is not None else kwargs)
+        return Message(self, make_message_id(len(self.sent)), content)
+
+    async def delete_messages(self, messages):
+        self.deleted.extend(message.id for message in messages)
+
+
+def make_response(status, reason):
+    return SimpleNamespace(status=status, reason=reason)
+
+
+# a bot without a Discord connection, with just what the commands under test use
+def make_bot(database):
+    bot = TabletopBot.__new__(TabletopBot)
+    bot.config = {"owner_id": OWNER_ID}
+    bot.database = database
+    bot.message_dispatcher = MessageDispatcher(rate=1000, burst=1000)
+    bot.render_cache = RenderCache()
+    bot.refreshes_games = True
+    return bot
+
+
+def make_state(channel):
+    return SimpleNamespace(channel_id=channel.id, channel=channel, vote_tally=None)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_database_engine(make_config("sqlite:///" + str(tmp_path / "bot.db")))
+    migrate(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def database(engine):
+    database = DataAccess()
+    yield database
+    database.close()
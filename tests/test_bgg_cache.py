@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from bot.BGGCache import BGGCache
+from bot.DataAccess import DataAccess
+from bot.models.CacheEntry import CacheEntry
+
+
+def test_set_updates_a_row_another_process_added_meanwhile(engine):
+    bgg_cache = BGGCache(None, {})
+    now = datetime.now()
+    session = DataAccess.create_session()
+
+    # the other process adds the row after this one found none, just before this one's insert
+    @event.listens_for(session, "before_flush", once=True)
+    def add_from_other_process(flushing_session, flush_context, instances):
+        other_session = DataAccess.create_session()
+        other_session.add(CacheEntry(namespace="boardgame", key="13", value="old", expires_at=now,
+                                     accessed_at=now))
+        other_session.commit()
+        other_session.close()
+
+    bgg_cache.set_in_database(session, "boardgame", "13", "new", now + timedelta(hours=1), now)
+    session.close()
+
+    session = DataAccess.create_session()
+    entries = session.query(CacheEntry.value, CacheEntry.expires_at).all()
+    session.close()
+    assert entries == [("new", now + timedelta(hours=1))]
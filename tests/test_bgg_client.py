@@ -0,0 +1,108 @@
+import asyncio
+import os
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from bot.BGGClient import BGGClient, BGGError
+from tests.conftest import run
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "bgg", "13.xml")
+
+
+# answers with the scripted statuses in order, then with the recorded game
+class StubBGG:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+        with open(FIXTURE, "rb") as fixture:
+            self.content = fixture.read()
+
+    async def handle(self, request):
+        self.requests.append(request.path)
+        if self.responses:
+            status, headers = self.responses.pop(0)
+            return web.Response(status=status, headers=headers)
+        return web.Response(body=self.content, content_type="text/xml")
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    delays = []
+    sleep = asyncio.sleep
+
+    # the backoff is recorded instead of waited out, aiohttp's own sleep(0) calls aren't part of it
+    async def record_sleep(delay, *args, **kwargs):
+        if delay:
+            delays.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", record_sleep)
+    return delays
+
+
+def fetch(stub, max_retries=5):
+    async def fetch_game():
+        app = web.Application()
+        app.router.add_get("/xmlapi/boardgame/{game_id}", stub.handle)
+        server = TestServer(app)
+        await server.start_server()
+        client = BGGClient(base_url=str(server.make_url("/")), max_retries=max_retries, retry_delay=0.5)
+        try:
+            return await client.fetch_game(13)
+        finally:
+            await client.close()
+            await server.close()
+
+    return run(fetch_game())
+
+
+def test_queued_request_is_retried_with_backoff(delays):
+    stub = StubBGG([(202, {}), (202, {})])
+
+    assert fetch(stub) == stub.content
+    assert stub.requests == ["/xmlapi/boardgame/13"] * 3
+    assert delays == [0.5, 1.0]
+
+
+def test_throttled_request_waits_for_retry_after(delays):
+    stub = StubBGG([(429, {"Retry-After": "7"}), (503, {})])
+
+    assert fetch(stub) == stub.content
+    assert delays == [7, 1.0]
+
+
+def test_retries_stop_at_the_cap(delays):
+    stub = StubBGG([(202, {})] * 10)
+
+    with pytest.raises(BGGError, match="after 2 retries"):
+        fetch(stub, max_retries=2)
+    assert len(stub.requests) == 3
+    assert delays == [0.5, 1.0]
+
+
+def test_other_errors_are_not_retried(delays):
+    stub = StubBGG([(500, {})])
+
+    with pytest.raises(BGGError, match="HTTP 500"):
+        fetch(stub)
+    assert len(stub.requests) == 1
+    assert delays == []
+
+
+def test_connection_errors_surface_as_bgg_errors(delays):
+    async def fetch_game():
+        server = TestServer(web.Application())
+        await server.start_server()
+        url = str(server.make_url("/"))
+        await server.close()
+        client = BGGClient(base_url=url, max_retries=1, retry_delay=0.5)
+        try:
+            return await client.fetch_game(13)
+        finally:
+            await client.close()
+
+    with pytest.raises(BGGError, match="request failed"):
+        run(fetch_game())
+    assert delays == [0.5]
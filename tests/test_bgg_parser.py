@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from bot.BGGParser import parse_boardgame
+
+# BeautifulSoup is only needed to check the parser against the path it replaced, the bot doesn't use it
+pytest.importorskip("lxml")
+pytest.importorskip("bs4")
+from benchmarks.bench_bgg_parser import parse_boardgame_with_beautifulsoup  # noqa: E402
+
+# responses in the layout of the XML API, each with the language_dependence and suggested_playerage polls next to
+# suggested_numplayers, in a different order in each
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "bgg")
+GAME_IDS = ["13", "174430", "178900"]
+
+
+def read_fixture(game_id):
+    with open(os.path.join(FIXTURES, game_id + ".xml"), "rb") as fixture:
+        return fixture.read()
+
+
+@pytest.mark.parametrize("game_id", GAME_IDS)
+def test_parser_matches_beautifulsoup(game_id):
+    content = read_fixture(game_id)
+
+    expected = parse_boardgame_with_beautifulsoup(content.decode("utf-8"), game_id)
+    actual = parse_boardgame(content, game_id)
+
+    assert set(actual) == set(expected) | {"alternate_names"}
+    for field, value in expected.items():
+        assert actual[field] == value, field
+
+
+def test_parser_reads_only_the_player_count_poll():
+    game_info = parse_boardgame(read_fixture("178900"), "178900")
+
+    assert game_info["game_title"] == "Codenames"
+    assert game_info["playtime"] == "15 minutes"
+    assert game_info["best"] == "6"
+    assert game_info["alternate_names"] == ["Code Names", "Kryptonim"]
@@ -0,0 +1,30 @@
+from bot.MessageDispatcher import MAX_MESSAGE_LENGTH
+from bot.TabletopBot import TabletopBot
+from tests.conftest import CHANNEL_ID, Channel, make_bot, make_game_info, make_state, run
+
+
+def add_suggestions(database, size, title_length):
+    member = run(database.get_member(CHANNEL_ID, 1, "member#1"))
+    for index in range(size):
+        game_info = make_game_info(100 + index)
+        game_info["game_title"] = "{0} ".format(index).ljust(title_length, "x")
+        run(database.add_suggestion(CHANNEL_ID, member.id, run(database.add_game(game_info)).id))
+
+
+def test_board_lists_every_suggestion_that_fits(engine, database):
+    add_suggestions(database, 10, 20)
+
+    board = run(TabletopBot.get_board_string(make_bot(database), make_state(Channel())))
+
+    assert board.count("votes: 0") == 10
+    assert "https://" not in board
+
+
+def test_board_stays_within_one_message(engine, database):
+    add_suggestions(database, 100, 60)
+
+    board = run(TabletopBot.get_board_string(make_bot(database), make_state(Channel())))
+
+    assert len(board) <= MAX_MESSAGE_LENGTH
+    shown = board.count("votes: 0")
+    assert board.endswith("...and {0} more".format(100 - shown))
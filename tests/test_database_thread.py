@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from bot.TabletopBot import TabletopBot
+from tests.conftest import Channel, make_bot, make_state, run
+
+
+def slow_query(session):
+    session.execute(text("SELECT 1"))
+    time.sleep(0.5)
+
+
+def test_slow_query_does_not_delay_ping(database):
+    bot = make_bot(database)
+    channel = Channel()
+    state = make_state(channel)
+
+    async def commands():
+        loop = asyncio.get_event_loop()
+        slow = asyncio.ensure_future(database.run(slow_query))
+        await asyncio.sleep(0.05)
+        started = loop.time()
+        await TabletopBot.ping(bot, state, None, ["ping"])
+        ping_time = loop.time() - started
+        slow_was_running = not slow.done()
+        await slow
+        bot.message_dispatcher.close()
+        return ping_time, slow_was_running
+
+    ping_time, slow_was_running = run(commands())
+    assert slow_was_running
+    assert ping_time < 0.1
+    assert channel.sent == ["Pong!"]
@@ -0,0 +1,36 @@
+import asyncio
+
+from sqlalchemy.exc import OperationalError
+
+from bot.DeletionScheduler import DeletionScheduler
+from tests.conftest import CHANNEL_ID, Channel, Message, make_message_id, run
+
+
+class LockedDatabaseScheduler(DeletionScheduler):
+    failures = 1
+
+    @staticmethod
+    def remove_pending_deletions(session, row_ids):
+        if LockedDatabaseScheduler.failures:
+            LockedDatabaseScheduler.failures -= 1
+            raise OperationalError("DELETE FROM pending_deletions", {}, Exception("database is locked"))
+        DeletionScheduler.remove_pending_deletions(session, row_ids)
+
+
+def test_scheduler_keeps_running_after_a_database_error(database):
+    channel = Channel()
+    message_ids = [make_message_id(1), make_message_id(2)]
+
+    async def delete():
+        scheduler = LockedDatabaseScheduler(database, {CHANNEL_ID: channel}.get, tick=0.01)
+        await scheduler.schedule(channel, Message(channel, message_ids[0], "first"), 0)
+        await scheduler.schedule(channel, Message(channel, message_ids[1], "second"), 0.1)
+        for _ in range(100):
+            if len(channel.deleted) == 2:
+                break
+            await asyncio.sleep(0.01)
+        scheduler.close()
+
+    run(delete())
+
+    assert channel.deleted == message_ids
@@ -0,0 +1,28 @@
+import asyncio
+
+from bot.GameRefresher import GameRefresher
+from tests.conftest import run
+
+
+class FailingRefresher(GameRefresher):
+    def __init__(self):
+        super().__init__(None, None, None, max_age=None, interval=0)
+        self.rounds = 0
+
+    async def refresh_stale_games(self):
+        self.rounds += 1
+        if self.rounds == 1:
+            raise TypeError("unsupported operand type(s) for +: 'NoneType' and 'str'")
+        return 0
+
+
+def test_refresher_keeps_running_after_an_unexpected_error():
+    async def refresh():
+        refresher = FailingRefresher()
+        refresher.start()
+        for _ in range(100):
+            await asyncio.sleep(0)
+        refresher.task.cancel()
+        return refresher.rounds
+
+    assert run(refresh()) > 2
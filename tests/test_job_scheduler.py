@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from bot.JobScheduler import JobScheduler
+from tests.conftest import run
+
+
+def get_jobs(engine):
+    with engine.begin() as connection:
+        return connection.execute(text("SELECT channel_id, kind, target_id FROM scheduled_jobs")).all()
+
+
+def test_moving_a_job_moves_it_to_the_new_channel(engine, database):
+    run(database.run(JobScheduler.save_scheduled_job, 500, "poll_close", 1, datetime.now()))
+    run(database.run(JobScheduler.save_scheduled_job, 600, "poll_close", 1, datetime.now()))
+
+    assert get_jobs(engine) == [(600, "poll_close", 1)]
+
+
+def test_job_is_removed_only_after_its_handler_returns(engine, database):
+    jobs_while_running = []
+
+    async def close_poll(poll_id):
+        jobs_while_running.extend(get_jobs(engine))
+        handled.set()
+
+    async def run_job():
+        scheduler = JobScheduler(database, {"poll_close": close_poll})
+        await scheduler.schedule(500, "poll_close", 1, datetime.now() - timedelta(seconds=1))
+        await asyncio.wait_for(handled.wait(), 5)
+        # the row is removed on the database thread once the handler has returned
+        for _ in range(100):
+            if not get_jobs(engine):
+                break
+            await asyncio.sleep(0.01)
+        scheduler.close()
+
+    handled = asyncio.Event()
+    run(run_job())
+
+    assert jobs_while_running == [(500, "poll_close", 1)]
+    assert get_jobs(engine) == []
@@ -0,0 +1,74 @@
+import asyncio
+
+import discord
+from sqlalchemy import text
+
+from bot.DeletionScheduler import DeletionScheduler
+from bot.MessageDispatcher import MessageDispatcher
+from tests.conftest import Channel, make_bot, make_response, run
+
+RATE = 100
+BURST = 3
+
+
+# rejects a message the way Discord does once more than the burst has been sent within the window
+class RateLimitedChannel(Channel):
+    def __init__(self):
+        super().__init__()
+        self.send_times = []
+
+    async def send(self, content=None, **kwargs):
+        now = asyncio.get_event_loop().time()
+        if len([sent_at for sent_at in self.send_times if now - sent_at < BURST / RATE]) >= BURST:
+            raise discord.errors.HTTPException(make_response(429, "Too Many Requests"), "You are being rate limited.")
+        self.send_times.append(now)
+        return await super().send(content, **kwargs)
+
+
+def test_announcements_go_out_before_waiting_replies():
+    async def send():
+        dispatcher = MessageDispatcher(rate=RATE, burst=BURST)
+        channel = RateLimitedChannel()
+        await asyncio.gather(dispatcher.send_ephemeral(channel, "reply", 10),
+                             dispatcher.send(channel, "announcement"))
+        dispatcher.close()
+        return channel.sent
+
+    assert run(send()) == ["announcement", "reply"]
+
+
+def test_messages_are_spread_over_the_window():
+    async def send():
+        dispatcher = MessageDispatcher(rate=RATE, burst=BURST)
+        channel = RateLimitedChannel()
+        await asyncio.gather(*(dispatcher.send(channel, str(number)) for number in range(BURST * 3)))
+        dispatcher.close()
+        return channel
+
+    channel = run(send())
+
+    assert channel.sent == [str(number) for number in range(BURST * 3)]
+    # never more than the burst within a window, so the second and third bursts each waited for one
+    assert channel.send_times[-1] - channel.send_times[0] >= 2 * BURST / RATE * 0.99
+
+
+def test_merged_replies_are_deleted_once(engine, database):
+    channel = RateLimitedChannel()
+    bot = make_bot(database)
+    bot.message_dispatcher = MessageDispatcher(rate=RATE, burst=BURST)
+    bot.deletion_scheduler = DeletionScheduler(database, {channel.id: channel}.get)
+
+    async def send():
+        await asyncio.gather(*(bot.send_message_safe(channel, "reply " + str(number), 10 + number)
+                               for number in range(BURST * 2)))
+        bot.message_dispatcher.close()
+        bot.deletion_scheduler.close()
+
+    run(send())
+
+    with engine.begin() as connection:
+        pending = connection.execute(text("SELECT message_id FROM pending_deletions")).all()
+    assert len(channel.sent) == 1
+    assert channel.sent[0] == "\n".join("reply " + str(number) for number in range(BURST * 2))
+    assert len(pending) == 1
+    assert bot.message_dispatcher.stats["coalesced"] == BURST * 2 - 1
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from bot.Base import Base
+from bot.Migrations import DISCORD_ID_COLUMNS, assign_default_channel, migrate
+from tests.conftest import CHANNEL_ID
+
+
+def test_jobs_of_polls_from_before_channels_are_assigned_the_default_channel(engine):
+    # an active poll as it was before channels existed, migration 6 gave it a poll_close job
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO events (id, name, date) VALUES (1, 'Night', '2099-01-01 19:00:00')"))
+        connection.execute(text("INSERT INTO game_polls (id, event_id, active, finish_time) "
+                                "VALUES (1, 1, 1, '2099-01-01 12:00:00')"))
+        connection.execute(text("INSERT INTO scheduled_jobs (kind, target_id, run_at) "
+                                "VALUES ('poll_close', 1, '2099-01-01 12:00:00')"))
+        connection.execute(text("INSERT INTO scheduled_jobs (kind, target_id, run_at) "
+                                "VALUES ('event_reminder', 1, '2098-12-31 19:00:00')"))
+
+    migrate(engine)
+    assign_default_channel(engine, CHANNEL_ID)
+
+    with engine.begin() as connection:
+        channel_ids = connection.execute(text("SELECT kind, channel_id FROM scheduled_jobs")).all()
+    assert sorted(channel_ids) == [("event_reminder", CHANNEL_ID), ("poll_close", CHANNEL_ID)]
+
+
+def test_migrate_creates_every_table_on_its_own(tmp_path):
+    # run in a fresh interpreter, so no other module has imported the models first
+    script = ("from sqlalchemy import inspect\n"
+              "from bot.Base import create_database_engine\n"
+              "from bot.Migrations import migrate\n"
+              "from tests.conftest import make_config\n"
+              "engine = create_database_engine(make_config('sqlite:///" + str(tmp_path / "bot.db") + "'))\n"
+              "migrate(engine)\n"
+              "print(sorted(inspect(engine).get_table_names()))\n")
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+
+    for table in ["bgg_cache", "games", "pending_deletions", "scheduled_jobs"]:
+        assert "'" + table + "'" in output.splitlines()[-1]
+
+
+def test_discord_ids_are_big_integers_on_postgresql():
+    for table, column in DISCORD_ID_COLUMNS:
+        create_table = str(CreateTable(Base.metadata.tables[table]).compile(dialect=postgresql.dialect()))
+        assert "\t" + column + " BIGINT" in create_table, (table, column)
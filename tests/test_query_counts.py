@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, text
+
+from bot.TabletopBot import TabletopBot
+from tests.conftest import CHANNEL_ID, Channel, make_bot, make_game_info, make_state, run
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def count_statement(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self.count_statement)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "before_cursor_execute", self.count_statement)
+
+
+def add_events(engine, database, size):
+    for index in range(size):
+        game = run(database.add_game(make_game_info(100 + index)))
+        new_event = run(database.create_event(CHANNEL_ID, datetime.now() + timedelta(days=index + 1),
+                                              "Night {0}".format(index)))
+        # every other event has its game decided
+        if index % 2 == 0:
+            with engine.begin() as connection:
+                connection.execute(text("UPDATE events SET game_decided = 1, winning_game_id = :game_id "
+                                        "WHERE id = :event_id"), {"game_id": game.id, "event_id": new_event.id})
+
+
+def add_voted_suggestions(database, size):
+    for index in range(size):
+        member = run(database.get_member(CHANNEL_ID, index + 1, "member#{0}".format(index)))
+        game = run(database.add_game(make_game_info(100 + index)))
+        suggestion = run(database.add_suggestion(CHANNEL_ID, member.id, game.id))
+        run(database.set_vote(CHANNEL_ID, member.id, suggestion.id))
+
+
+@pytest.mark.parametrize("size", [1, 5, 20])
+def test_events_runs_one_statement(engine, database, size):
+    add_events(engine, database, size)
+    bot = make_bot(database)
+    channel = Channel()
+
+    with StatementCounter(engine) as counter:
+        run(TabletopBot.events(bot, make_state(channel), None, ["events"]))
+
+    assert counter.count == 1
+    assert channel.sent[0].count("\n") == size
+
+
+@pytest.mark.parametrize("size", [1, 5, 20])
+def test_suggestions_runs_one_statement(engine, database, size):
+    add_voted_suggestions(database, size)
+    bot = make_bot(database)
+    channel = Channel()
+
+    with StatementCounter(engine) as counter:
+        run(TabletopBot.suggestions(bot, make_state(channel), None, ["suggestions"]))
+
+    assert counter.count == 1
+    assert len(channel.sent) == size
+
+
+@pytest.mark.parametrize("size", [1, 5, 20])
+def test_board_runs_two_statements(engine, database, size):
+    add_voted_suggestions(database, size)
+    bot = make_bot(database)
+
+    with StatementCounter(engine) as counter:
+        board = run(TabletopBot.get_board_string(bot, make_state(Channel())))
+
+    assert counter.count == 2
+    assert board.count("votes: 1") == size
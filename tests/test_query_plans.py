@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from tests.conftest import CHANNEL_ID, make_game_info, run
+
+# the lookups each command makes, with the index that has to answer them
+COMMAND_LOOKUPS = {
+    "member": (lambda database, rows: database.run(database.load_member, CHANNEL_ID, 2, "second#2"),
+               "ix_members_channel_id_discord_id"),
+    "rsvp": (lambda database, rows: database.add_rsvp(rows["member"].id, rows["event"].id),
+             "ix_rsvps_event_id_member_id"),
+    "cancel": (lambda database, rows: database.remove_rsvp(rows["member"].id, rows["event"].id),
+               "ix_rsvps_event_id_member_id"),
+    "vote": (lambda database, rows: database.set_vote(CHANNEL_ID, rows["member"].id, rows["suggestion"].id),
+             "ix_votes_channel_id_member_id"),
+    "vote_number": (lambda database, rows: database.get_suggestion_by_vote_number(CHANNEL_ID, 1),
+                    "ix_suggestions_channel_id_vote_number"),
+    "suggestion_author": (lambda database, rows: database.get_suggestion_author(CHANNEL_ID, rows["game"].id),
+                          "ix_suggestions_channel_id_game_id"),
+    "game": (lambda database, rows: database.get_game_by_bgg_id(13), "ix_games_bgg_id")
+}
+
+
+def capture_statements(engine, function):
+    statements = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        function()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return statements
+
+
+@pytest.mark.parametrize("command", sorted(COMMAND_LOOKUPS))
+def test_command_lookups_use_an_index(engine, database, command):
+    member = run(database.get_member(CHANNEL_ID, 1, "first#1"))
+    game = run(database.add_game(make_game_info(13)))
+    rows = {
+        "member": member,
+        "game": game,
+        "event": run(database.create_event(CHANNEL_ID, datetime.now() + timedelta(days=1), "Night")),
+        "suggestion": run(database.add_suggestion(CHANNEL_ID, member.id, game.id))
+    }
+    lookup, index_name = COMMAND_LOOKUPS[command]
+
+    statements = capture_statements(engine, lambda: run(lookup(database, rows)))
+
+    plans = []
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            if statement.startswith("INSERT"):
+                continue
+            plan = [row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+            # SCAN is a full table scan, every step has to SEARCH an index or the primary key
+            assert plan and all(detail.startswith("SEARCH") for detail in plan), (statement, plan)
+            plans.extend(plan)
+    assert any(index_name in detail for detail in plans), plans
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+from bot.Base import Session
+from bot.DataAccess import DataAccess
+from bot.DeletionScheduler import DeletionScheduler
+from bot.JobScheduler import JobScheduler
+from run import get_worker_shard_ids
+from tests.conftest import Channel, run
+
+SHARD_COUNT = 4
+WORKER_COUNT = 2
+# channel id -> guild id, guild i is on shard i % SHARD_COUNT
+GUILDS = {500 + guild: guild << 22 for guild in range(8)}
+
+
+# sees only the channels in guilds on its own shards, like a worker's Discord connection
+class FakeGateway:
+    def __init__(self, shard_ids):
+        self.shard_ids = shard_ids
+
+    def get_channel(self, channel_id):
+        if (GUILDS[channel_id] >> 22) % SHARD_COUNT not in self.shard_ids:
+            return None
+        return Channel(channel_id)
+
+
+def test_shards_are_dealt_out_in_turn():
+    assert get_worker_shard_ids(4, 2) == [[0, 2], [1, 3]]
+    assert get_worker_shard_ids(5, 2) == [[0, 2, 4], [1, 3]]
+    assert get_worker_shard_ids(2, 2) == [[0], [1]]
+
+
+def test_each_worker_loads_only_its_own_jobs_and_deletions(engine, database):
+    later = datetime.now() + timedelta(hours=1)
+    for channel_id in GUILDS:
+        run(database.run(JobScheduler.save_scheduled_job, channel_id, "poll_close", channel_id, later))
+        run(database.run(DeletionScheduler.add_pending_deletion, channel_id, channel_id, later))
+
+    async def start(gateway):
+        job_scheduler = JobScheduler(database, {})
+        deletion_scheduler = DeletionScheduler(database, gateway.get_channel)
+        await job_scheduler.start([channel_id for channel_id in GUILDS if gateway.get_channel(channel_id) is not None])
+        await deletion_scheduler.start()
+        await asyncio.sleep(0)
+        job_scheduler.close()
+        deletion_scheduler.close()
+        return {entry[3] for entry in job_scheduler.heap}, {entry[2] for entry in deletion_scheduler.heap}
+
+    loaded = [run(start(FakeGateway(shard_ids))) for shard_ids in get_worker_shard_ids(SHARD_COUNT, WORKER_COUNT)]
+
+    assert loaded[0] == ({500, 502, 504, 506}, {500, 502, 504, 506})
+    assert loaded[1] == ({501, 503, 505, 507}, {501, 503, 505, 507})
+
+
+def test_only_one_worker_claims_a_poll(engine, database):
+    run(database.start_poll(500, None, datetime.now() + timedelta(hours=1)))
+    # both workers' updates start at once, each in its own session and thread
+    barrier = threading.Barrier(2)
+    claims = []
+
+    def claim():
+        session = Session()
+        barrier.wait()
+        claims.append(DataAccess.claim_poll(session, 500))
+        session.commit()
+        session.close()
+
+    workers = [threading.Thread(target=claim) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sorted(claims) == [False, True]
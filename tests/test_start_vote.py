@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import discord
+from sqlalchemy import text
+
+from bot.ChannelState import ChannelState
+from bot.DeletionScheduler import DeletionScheduler
+from bot.JobScheduler import JobScheduler
+from bot.LiveBoard import LiveBoard
+from bot.TabletopBot import TabletopBot
+from tests.conftest import CHANNEL_ID, OWNER_ID, Channel, Message, make_bot, make_game_info, make_response, run
+
+
+class UndeletableMessage(Message):
+    async def delete(self):
+        raise discord.errors.Forbidden(make_response(403, "Forbidden"), "Missing Permissions")
+
+
+def make_poll_bot(database, message_type=Message):
+    member = run(database.get_member(CHANNEL_ID, OWNER_ID, "owner#1"))
+    game = run(database.add_game(make_game_info(13)))
+    run(database.add_suggestion(CHANNEL_ID, member.id, game.id))
+    event = run(database.create_event(CHANNEL_ID, datetime.now() + timedelta(days=1), "Night"))
+
+    bot = make_bot(database)
+    channel = Channel()
+    bot.job_scheduler = JobScheduler(database, {})
+    bot.deletion_scheduler = DeletionScheduler(database, {CHANNEL_ID: channel}.get)
+    state = ChannelState(CHANNEL_ID, "77", None)
+    state.live_board = LiveBoard(lambda: bot.get_board_string(state))
+    state.channel = channel
+    start_vote = (TabletopBot.start_vote, message_type(channel, 1, "!start_vote", SimpleNamespace(id=OWNER_ID)),
+                  ["start_vote", str(event.id), "1"])
+    return bot, state, event, start_vote
+
+
+# every command runs in its own unit of work, on one event loop
+async def run_commands(bot, state, *commands):
+    for command, message, arguments in commands:
+        async with bot.database.unit_of_work():
+            await command(bot, state, message, arguments)
+    state.live_board.detach()
+    bot.job_scheduler.close()
+    bot.deletion_scheduler.close()
+    bot.message_dispatcher.close()
+
+
+def get_jobs(engine):
+    with engine.begin() as connection:
+        return sorted(connection.execute(text("SELECT kind, channel_id FROM scheduled_jobs")).all())
+
+
+def test_poll_jobs_are_scheduled_when_the_command_can_not_be_deleted(engine, database):
+    bot, state, event, start_vote = make_poll_bot(database, UndeletableMessage)
+    run(run_commands(bot, state, start_vote))
+
+    assert get_jobs(engine) == [("poll_close", CHANNEL_ID), ("poll_reminder", CHANNEL_ID)]
+    assert len(state.channel.sent) == 2
+
+
+def test_ending_the_poll_cancels_its_jobs(engine, database):
+    bot, state, event, start_vote = make_poll_bot(database)
+    end_vote = (TabletopBot.end_vote, Message(state.channel, 2, "!end_vote", SimpleNamespace(id=OWNER_ID)),
+                ["end_vote"])
+    run(run_commands(bot, state, start_vote, end_vote))
+
+    assert get_jobs(engine) == []
+
+
+def test_cancelling_the_event_cancels_its_poll_jobs(engine, database):
+    bot, state, event, start_vote = make_poll_bot(database)
+    cancel_event = (TabletopBot.cancel_event, Message(state.channel, 2, "!cancel_event", SimpleNamespace(id=OWNER_ID)),
+                    ["cancel_event", str(event.id)])
+    run(run_commands(bot, state, start_vote, cancel_event))
+
+    assert get_jobs(engine) == []
@@ -0,0 +1,25 @@
+from tests.conftest import CHANNEL_ID, make_game_info, run
+
+
+def test_suggesting_a_game_twice_returns_none(database):
+    first_member = run(database.get_member(CHANNEL_ID, 1, "first#1"))
+    second_member = run(database.get_member(CHANNEL_ID, 2, "second#2"))
+    game = run(database.add_game(make_game_info(13)))
+    other_game = run(database.add_game(make_game_info(14)))
+
+    # both passed the get_suggestion_author check before either was added
+    assert run(database.add_suggestion(CHANNEL_ID, first_member.id, game.id)).vote_number == 1
+    assert run(database.add_suggestion(CHANNEL_ID, second_member.id, game.id)) is None
+    assert run(database.get_suggestion_author(CHANNEL_ID, game.id)).name == "first#1"
+
+    # the number handed to the rejected suggestion is used again
+    assert run(database.add_suggestion(CHANNEL_ID, second_member.id, other_game.id)).vote_number == 2
+
+
+def test_the_same_game_can_be_suggested_in_another_channel(database):
+    member = run(database.get_member(CHANNEL_ID, 1, "first#1"))
+    other_member = run(database.get_member(CHANNEL_ID + 1, 1, "first#1"))
+    game = run(database.add_game(make_game_info(13)))
+
+    assert run(database.add_suggestion(CHANNEL_ID, member.id, game.id)) is not None
+    assert run(database.add_suggestion(CHANNEL_ID + 1, other_member.id, game.id)).vote_number == 1
@@ -0,0 +1,28 @@
+from bot.TabletopBot import TabletopBot
+from tests.conftest import CHANNEL_ID, OWNER_ID
+
+CONFIG = """[Credentials]
+Token = token
+[Permissions]
+OwnerID = {0}
+[Chat]
+CommandPrefix = !
+BindToChannels = {1}
+MentionGroupID = 77
+[Database]
+URL = sqlite:///{2}
+"""
+
+
+def test_bot_is_created_with_its_config(tmp_path, monkeypatch):
+    config_file = tmp_path / "options.ini"
+    config_file.write_text(CONFIG.format(OWNER_ID, CHANNEL_ID, tmp_path / "bot.db"))
+    monkeypatch.setattr(TabletopBot, "config_file", str(config_file))
+
+    bot = TabletopBot(shard_ids=[0], shard_count=2)
+
+    assert bot.shard_ids == [0]
+    assert list(bot.channels) == [CHANNEL_ID]
+    assert bot.refreshes_games
+    bot.database.close()
+    bot.engine.dispose()
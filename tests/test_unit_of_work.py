@@ -0,0 +1,47 @@
+import asyncio
+
+from bot.DataAccess import current_unit_of_work
+from bot.LiveBoard import LiveBoard
+from bot.SingleFlight import SingleFlight
+from tests.conftest import CHANNEL_ID, run
+
+
+class Message:
+    async def edit(self, content):
+        pass
+
+
+def test_live_board_update_started_by_a_command_has_no_unit_of_work(database):
+    seen = []
+
+    async def render():
+        seen.append(current_unit_of_work.get())
+        return "board"
+
+    async def command():
+        live_board = LiveBoard(render, delay=0)
+        live_board.attach(Message())
+        async with database.unit_of_work():
+            live_board.request_update()
+        await live_board.task
+
+    run(command())
+    assert seen == [None]
+
+
+def test_single_flight_function_outlives_the_command_that_started_it(database):
+    async def get_events():
+        await asyncio.sleep(0.01)
+        return current_unit_of_work.get(), await database.get_saved_messages(CHANNEL_ID)
+
+    async def commands():
+        single_flight = SingleFlight()
+        async with database.unit_of_work():
+            first = asyncio.ensure_future(single_flight.do("events", get_events))
+            await asyncio.sleep(0)
+        # the first command is done and its session closed, the second one waits for the same lookup
+        async with database.unit_of_work():
+            return await single_flight.do("events", get_events), await first
+
+    second, first = run(commands())
+    assert first[0] is None and second[0] is None
@@ -0,0 +1,56 @@
+from tests.conftest import CHANNEL_ID, make_game_info, run
+
+
+def add_suggestions(database, author, game_ids):
+    suggestions = []
+    for game_id in game_ids:
+        game = run(database.add_game(make_game_info(game_id)))
+        suggestions.append(run(database.add_suggestion(CHANNEL_ID, author.id, game.id)))
+    return suggestions
+
+
+def test_load_vote_tally_counts_every_voter_once(database):
+    author = run(database.get_member(CHANNEL_ID, 1, "author#1"))
+    voters = [run(database.get_member(CHANNEL_ID, discord_id, "voter#{0}".format(discord_id)))
+              for discord_id in (2, 3, 4)]
+    first, second = add_suggestions(database, author, [13, 14])
+
+    # the author votes too, and only one of the voters authored a suggestion
+    run(database.set_vote(CHANNEL_ID, voters[0].id, first.id))
+    run(database.set_vote(CHANNEL_ID, voters[1].id, second.id))
+    run(database.set_vote(CHANNEL_ID, voters[2].id, second.id))
+    run(database.set_vote(CHANNEL_ID, author.id, second.id))
+
+    vote_tally = run(database.load_vote_tally(CHANNEL_ID))
+
+    assert {row.id: row.vote_quantity for row in vote_tally.get_totals()} == {first.id: 1, second.id: 3}
+    assert vote_tally.find_mismatches(run(database.get_current_vote_totals(CHANNEL_ID))) == []
+
+
+def test_revote_moves_the_whole_weight(database):
+    author = run(database.get_member(CHANNEL_ID, 1, "author#1"))
+    voter = run(database.get_member(CHANNEL_ID, 2, "voter#2"))
+    first, second = add_suggestions(database, author, [13, 14])
+
+    run(database.set_vote(CHANNEL_ID, voter.id, first.id))
+    vote_tally = run(database.load_vote_tally(CHANNEL_ID))
+    run(database.set_vote(CHANNEL_ID, voter.id, second.id))
+    vote_tally.apply_vote(voter.id, second.id, voter.power)
+
+    assert {row.id: row.vote_quantity for row in vote_tally.get_totals()} == {first.id: 0, second.id: 1}
+    reloaded = run(database.load_vote_tally(CHANNEL_ID))
+    assert reloaded.get_totals() == vote_tally.get_totals()
+
+
+def test_votes_of_other_channels_are_left_out(database):
+    author = run(database.get_member(CHANNEL_ID, 1, "author#1"))
+    other_author = run(database.get_member(CHANNEL_ID + 1, 1, "author#1"))
+    first, = add_suggestions(database, author, [13])
+    other_game = run(database.add_game(make_game_info(14)))
+    other = run(database.add_suggestion(CHANNEL_ID + 1, other_author.id, other_game.id))
+    run(database.set_vote(CHANNEL_ID, author.id, first.id))
+    run(database.set_vote(CHANNEL_ID + 1, other_author.id, other.id))
+
+    vote_tally = run(database.load_vote_tally(CHANNEL_ID))
+
+    assert {row.id: row.vote_quantity for row in vote_tally.get_totals()} == {first.id: 1}